@@ -1,58 +1,85 @@
+import os
+import importlib
+from typing import List, Optional, Sequence, Tuple
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from utils.db import engine, Base
-from routers import (
-    auth,
-    scalp,
-    swing,
-    market,
-    performance,
-    tools,
-    trades,
-    prices,
-    forum,
-)
+from fastapi.responses import ORJSONResponse
+from fastapi_limiter import FastAPILimiter
+from utils.db import engine, async_engine, Base
 from schemas.swing import start_alert_sync_task
-from routers.news import router as news_router
-# Create tables
-Base.metadata.create_all(bind=engine)
-
-app = FastAPI(
-    title="YoForex Chart Analysis API",
-    version="1.1.0",
-    description="Upload a trading chart image and get an AI‐powered analysis in JSON.",
-)
+from utils.http_client import close_http_client
+from utils.redis_client import redis_client, close_redis
 
-origins = [
+ORIGINS = [
     "http://localhost:3000",
     "https://app.axiontrust.com",
     "https://axiontrust.com",
 ]
 
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=origins,
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
-# your existing routers
-app.include_router(auth.router)
-app.include_router(scalp.router, prefix="/scalp", tags=["Chart Analysis"])
-app.include_router(swing.router, prefix="/swing", tags=["Chart Analysis"])
-
-# new functionality
-app.include_router(market.router, prefix="/market", tags=["Market"])
-app.include_router(performance.router, prefix="/performance", tags=["Performance"])
-app.include_router(tools.router, prefix="/tools", tags=["Tools"])
-
-
-# Initialize background tasks
-@app.on_event("startup")
-async def startup_event():
-    await start_alert_sync_task()
-app.include_router(news_router, prefix="/news", tags=["Trading News"])
-app.include_router(trades.router, prefix="/trades", tags=["Trades"])
-app.include_router(prices.router, prefix="/prices", tags=["Prices"])
-app.include_router(forum.router, prefix="/forum", tags=["Forum"])
\ No newline at end of file
+# (module, prefix, tags) — modules are only imported when an app is built
+ROUTERS: List[Tuple[str, str, Optional[List[str]]]] = [
+    # your existing routers
+    ("routers.auth", "", None),
+    ("routers.scalp", "/scalp", ["Chart Analysis"]),
+    ("routers.swing", "/swing", ["Chart Analysis"]),
+
+    # new functionality
+    ("routers.market", "/market", ["Market"]),
+    ("routers.performance", "/performance", ["Performance"]),
+    ("routers.tools", "/tools", ["Tools"]),
+    ("routers.news", "/news", ["Trading News"]),
+    ("routers.trades", "/trades", ["Trades"]),
+    ("routers.prices", "/prices", ["Prices"]),
+    ("routers.forum", "/forum", ["Forum"]),
+]
+
+
+def create_app(
+    *,
+    routers: Sequence[Tuple[str, str, Optional[List[str]]]] = ROUTERS,
+    origins: Sequence[str] = ORIGINS,
+    init_db: bool = False,
+) -> FastAPI:
+    """Build the FastAPI application with CORS and the given routers mounted."""
+    # Create tables only when explicitly asked to; deploys run scripts/init_db.py
+    if init_db:
+        Base.metadata.create_all(bind=engine)
+
+    app = FastAPI(
+        title="YoForex Chart Analysis API",
+        version="1.1.0",
+        description="Upload a trading chart image and get an AI‐powered analysis in JSON.",
+        # orjson encodes dicts, datetimes and validated models far faster
+        # than the stdlib json encoder FastAPI uses by default
+        default_response_class=ORJSONResponse,
+    )
+
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=list(origins),
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+
+    for module_name, prefix, tags in routers:
+        module = importlib.import_module(module_name)
+        app.include_router(module.router, prefix=prefix, tags=tags)
+
+    # Initialize background tasks
+    @app.on_event("startup")
+    async def startup_event():
+        await FastAPILimiter.init(redis_client)
+        await start_alert_sync_task()
+
+    @app.on_event("shutdown")
+    async def shutdown_event():
+        await close_http_client()
+        await close_redis()
+        await async_engine.dispose()
+
+    return app
+
+
+app = create_app(init_db=os.getenv("INIT_DB") == "1")
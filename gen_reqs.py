@@ -1,53 +1,48 @@
 #!/usr/bin/env python3
-import os, sys, ast, importlib.util, importlib
+import os, sys, ast
+from concurrent.futures import ProcessPoolExecutor
 
-packages = set()
-# Determine standard library directory
-stdlib_dir = os.path.dirname(os.path.dirname(importlib.__file__))
+def is_stdlib(pkg):
+    # sys.stdlib_module_names (3.10+) covers pure-Python, frozen and C stdlib modules
+    return pkg in sys.stdlib_module_names or pkg in sys.builtin_module_names
 
-for dirpath, dirnames, filenames in os.walk('.'):
-    # Skip virtualenvs and cache dirs
-    if any(ignored in dirpath for ignored in ('venv', '.venv', 'env', '__pycache__')):
-        continue
-    for fn in filenames:
-        if not fn.endswith('.py'):
-            continue
-        path = os.path.join(dirpath, fn)
-        try:
-            with open(path, 'r', encoding='utf-8', errors='ignore') as f:
-                tree = ast.parse(f.read(), filename=path)
-        except Exception as e:
-            print(f"Skipping {path}: {e}", file=sys.stderr)
+def iter_imports(tree):
+    # Every import in the file, including ones inside functions and classes
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                yield alias.name.split('.')[0]
+        elif isinstance(node, ast.ImportFrom):
+            if node.module and node.level == 0:
+                yield node.module.split('.')[0]
+
+def parse_file(path):
+    try:
+        with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+            tree = ast.parse(f.read(), filename=path)
+    except Exception as e:
+        print(f"Skipping {path}: {e}", file=sys.stderr)
+        return set()
+    return {pkg for pkg in iter_imports(tree) if pkg and not is_stdlib(pkg)}
+
+def find_sources(root='.'):
+    for dirpath, dirnames, filenames in os.walk(root):
+        # Skip virtualenvs and cache dirs
+        if any(ignored in dirpath for ignored in ('venv', '.venv', 'env', '__pycache__')):
             continue
-        for node in ast.walk(tree):
-            pkg = None
-            if isinstance(node, ast.Import):
-                for alias in node.names:
-                    pkg = alias.name.split('.')[0]
-                    # Process each imported pkg
-                    if pkg:
-                        # Skip builtins
-                        if pkg in sys.builtin_module_names:
-                            continue
-                        # Detect stdlib
-                        spec = importlib.util.find_spec(pkg)
-                        if spec and spec.origin and os.path.abspath(spec.origin).startswith(os.path.abspath(stdlib_dir)):
-                            continue
-                        packages.add(pkg)
-            elif isinstance(node, ast.ImportFrom):
-                if node.module and node.level == 0:
-                    pkg = node.module.split('.')[0]
-                    if pkg:
-                        if pkg in sys.builtin_module_names:
-                            continue
-                        spec = importlib.util.find_spec(pkg)
-                        if spec and spec.origin and os.path.abspath(spec.origin).startswith(os.path.abspath(stdlib_dir)):
-                            continue
-                        packages.add(pkg)
+        for fn in filenames:
+            if fn.endswith('.py'):
+                yield os.path.join(dirpath, fn)
+
+if __name__ == '__main__':
+    packages = set()
+    with ProcessPoolExecutor() as pool:
+        for found in pool.map(parse_file, find_sources(), chunksize=16):
+            packages |= found
 
-# Write out requirements.txt
-with open('requirements.txt', 'w') as out:
-    for pkg in sorted(packages):
-        out.write(pkg + '\n')
+    # Write out requirements.txt
+    with open('requirements.txt', 'w') as out:
+        for pkg in sorted(packages):
+            out.write(pkg + '\n')
 
-print(f"Found {len(packages)} packages. requirements.txt written.")
\ No newline at end of file
+    print(f"Found {len(packages)} packages. requirements.txt written.")
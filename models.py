@@ -1,12 +1,13 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, JSON, func, Text, ForeignKey, Table
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import relationship
 from datetime import datetime
 
-from utils.db import Base
-import json
-from sqlalchemy import Column, Integer, DateTime, func
+import orjson
+from sqlalchemy import (
+    Column, Computed, DDL, Integer, String, Boolean, DateTime, func, Text, ForeignKey, Table, Index, event, text,
+)
+from sqlalchemy.dialects.postgresql import JSONB, TSVECTOR
+from sqlalchemy.orm import deferred, relationship
 from sqlalchemy.types import TypeDecorator, TEXT
+
 from utils.db import Base
 
 # Association table for post likes
@@ -14,7 +15,9 @@ post_likes = Table(
     'post_likes',
     Base.metadata,
     Column('user_id', Integer, ForeignKey('users.id'), primary_key=True),
-    Column('post_id', Integer, ForeignKey('forum_posts.id'), primary_key=True)
+    Column('post_id', Integer, ForeignKey('forum_posts.id'), primary_key=True),
+    # PK leads with user_id; this serves per-post lookups
+    Index('ix_post_likes_post_user', 'post_id', 'user_id', unique=True),
 )
 
 # Association table for comment likes
@@ -22,7 +25,15 @@ comment_likes = Table(
     'comment_likes',
     Base.metadata,
     Column('user_id', Integer, ForeignKey('users.id'), primary_key=True),
-    Column('comment_id', Integer, ForeignKey('forum_comments.id'), primary_key=True)
+    Column('comment_id', Integer, ForeignKey('forum_comments.id'), primary_key=True),
+    Index('ix_comment_likes_comment_user', 'comment_id', 'user_id', unique=True),
+)
+
+# gin_trgm_ops needs the extension before the forum_posts indexes are created
+event.listen(
+    Base.metadata,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"),
 )
 
 class ForumCategory(Base):
@@ -39,6 +50,26 @@ class ForumCategory(Base):
 
 class ForumPost(Base):
     __tablename__ = "forum_posts"
+    __table_args__ = (
+        # Every read path filters is_deleted = false, so the btree indexes are
+        # partial: smaller, and deleted rows never need to be skipped.
+        # Listing: posts in a category, pinned first, newest first
+        Index(
+            "ix_forum_posts_live_cat_pinned_created", "category_id", "is_pinned", "created_at",
+            postgresql_where=text("is_deleted = false"),
+        ),
+        Index("ix_forum_posts_live_author", "author_id", postgresql_where=text("is_deleted = false")),
+        # Keyset pagination of the default listing (pinned first, newest first)
+        Index(
+            "ix_forum_posts_live_pinned_created_id", "is_pinned", "created_at", "id",
+            postgresql_where=text("is_deleted = false"),
+        ),
+        # Full-text search over title + content
+        Index("ix_forum_posts_search_tsv", "search_tsv", postgresql_using="gin"),
+        # Trigram indexes so substring (ILIKE '%term%') search can skip the seq scan
+        Index("ix_forum_posts_title_trgm", "title", postgresql_using="gin", postgresql_ops={"title": "gin_trgm_ops"}),
+        Index("ix_forum_posts_content_trgm", "content", postgresql_using="gin", postgresql_ops={"content": "gin_trgm_ops"}),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String(200), nullable=False)
@@ -49,6 +80,14 @@ class ForumPost(Base):
     is_locked = Column(Boolean, default=False)
     is_deleted = Column(Boolean, default=False)
     view_count = Column(Integer, default=0)
+    # Denormalized counters, kept in sync by the like/comment endpoints
+    like_count = Column(Integer, default=0, server_default="0", nullable=False)
+    comment_count = Column(Integer, default=0, server_default="0", nullable=False)  # non-deleted only
+    # Maintained by Postgres; deferred so listings don't pull the vector back
+    search_tsv = deferred(Column(
+        TSVECTOR,
+        Computed("to_tsvector('english', coalesce(title, '') || ' ' || coalesce(content, ''))", persisted=True),
+    ))
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
@@ -57,17 +96,17 @@ class ForumPost(Base):
     category = relationship("ForumCategory", back_populates="posts")
     comments = relationship("ForumComment", back_populates="post", cascade="all, delete-orphan")
     likes = relationship("User", secondary=post_likes, back_populates="liked_posts")
-    
-    @property
-    def like_count(self):
-        return len(self.likes)
-    
-    @property
-    def comment_count(self):
-        return len([c for c in self.comments if not c.is_deleted])
 
 class ForumComment(Base):
     __tablename__ = "forum_comments"
+    __table_args__ = (
+        # Rendering a post's live comments in order, and walking reply trees
+        Index(
+            "ix_forum_comments_live_post_created", "post_id", "created_at",
+            postgresql_where=text("is_deleted = false"),
+        ),
+        Index("ix_forum_comments_live_parent", "parent_id", postgresql_where=text("is_deleted = false")),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     content = Column(Text, nullable=False)
@@ -75,6 +114,8 @@ class ForumComment(Base):
     post_id = Column(Integer, ForeignKey("forum_posts.id"), nullable=False)
     parent_id = Column(Integer, ForeignKey("forum_comments.id"), nullable=True)  # For nested comments
     is_deleted = Column(Boolean, default=False)
+    # Denormalized counter, kept in sync by toggle_comment_like
+    like_count = Column(Integer, default=0, server_default="0", nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
@@ -84,10 +125,6 @@ class ForumComment(Base):
     parent = relationship("ForumComment", remote_side=[id])
     replies = relationship("ForumComment", back_populates="parent")
     likes = relationship("User", secondary=comment_likes, back_populates="liked_comments")
-    
-    @property
-    def like_count(self):
-        return len(self.likes)
 
 
 class User(Base):
@@ -100,7 +137,7 @@ class User(Base):
     password_hash = Column(String,  nullable=False)
     is_verified   = Column(Boolean, default=False, nullable=False)
     otp_code      = Column(String,  nullable=True)
-    otp_expiry    = Column(DateTime, nullable=True)
+    otp_expiry    = Column(DateTime(timezone=True), nullable=True)
     attempts      = Column(Integer, default=0, nullable=False)
     forum_posts = relationship("ForumPost", back_populates="author")
     forum_comments = relationship("ForumComment", back_populates="author")
@@ -108,22 +145,33 @@ class User(Base):
     liked_comments = relationship("ForumComment", secondary=comment_likes, back_populates="likes")
 
 class JSONEncodedDict(TypeDecorator):
-    """Enables JSN storage by encoding to/from TEXT on SQLite."""
+    """Native JSONB on Postgres; orjson-encoded TEXT on other dialects (SQLite)."""
     impl = TEXT
+    cache_ok = True
+
+    def load_dialect_impl(self, dialect):
+        if dialect.name == "postgresql":
+            return dialect.type_descriptor(JSONB())
+        return dialect.type_descriptor(TEXT())
 
     def process_bind_param(self, value, dialect):
-        if value is None:
-            return None
-        return json.dumps(value)
+        # JSONB serializes through the engine's json_serializer
+        if value is None or dialect.name == "postgresql":
+            return value
+        return orjson.dumps(value).decode()
 
     def process_result_value(self, value, dialect):
-        if value is None:
-            return None
-        return json.loads(value)
+        if value is None or dialect.name == "postgresql":
+            return value
+        return orjson.loads(value)
 
 class SwingAnalysisHistory(Base):
     __tablename__ = "swing_analysis_history"
+    __table_args__ = (
+        # History pages walk (created_at, id) newest first
+        Index("ix_swing_created_id", "created_at", "id"),
+    )
 
     id         = Column(Integer, primary_key=True, index=True)
-    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
     analysis   = Column(JSONEncodedDict, nullable=False)
\ No newline at end of file
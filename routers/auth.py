@@ -1,57 +1,105 @@
 import logging
 import re
 import os
-import random
-from datetime import datetime, timedelta
-from typing import Dict, Any, Optional
-
-import requests
+import secrets
+import hashlib
+import hmac
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from typing import Optional
+
+import httpx
 import phonenumbers
-from fastapi import APIRouter, HTTPException, Depends, status, Response, Request
+from fastapi import APIRouter, HTTPException, Depends, status, Response, Request, BackgroundTasks
+from fastapi.responses import ORJSONResponse
 from fastapi.security import OAuth2PasswordRequestForm
-from jose import JWTError, jwt
+from fastapi_limiter.depends import RateLimiter
+from jwt import InvalidTokenError
 from pydantic import BaseModel, EmailStr, validator
 from pydantic_core import PydanticCustomError
 from passlib.context import CryptContext
-from dotenv import load_dotenv
-from sqlalchemy.orm import Session
-
-from utils.db import get_db
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import load_only
+
+from utils.db import get_async_db
+from utils.http_client import client
+from utils.redis_client import redis_client
+from utils.jwt import ACCESS_TOKEN_EXPIRE_MINUTES, create_access_token, verify_access_token
+from utils.settings import settings
 from models import User
 
-# Load environment variables
-load_dotenv()
-
 # Logger
 logger = logging.getLogger(__name__)
 
-# Password hashing context
-pwd_context = CryptContext(schemes=["bcrypt_sha256"], deprecated="auto")
+# Password hashing context (bcrypt cost is 2^rounds, clamped to a sane range)
+BCRYPT_ROUNDS = max(4, min(14, settings.bcrypt_rounds))
+pwd_context = CryptContext(
+    schemes=["bcrypt_sha256"],
+    deprecated="auto",
+    bcrypt_sha256__rounds=BCRYPT_ROUNDS,
+)
 
-# JWT Configuration
-SECRET_KEY = os.getenv("JWT_SECRET_KEY")
-ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")
-ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("JWT_ACCESS_TOKEN_EXPIRE_MINUTES", 60))
+# bcrypt releases the GIL, so hashing on a pool keeps the event loop free
+# and lets concurrent logins use every core.
+_bcrypt_pool = ThreadPoolExecutor(max_workers=os.cpu_count())
+
+async def hash_password(password: str) -> str:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_bcrypt_pool, pwd_context.hash, password)
+
+async def verify_password(password: str, password_hash: str) -> bool:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_bcrypt_pool, pwd_context.verify, password, password_hash)
 
 # API router for authentication
-router = APIRouter(prefix="/auth", tags=["auth"])
+router = APIRouter(prefix="/auth", tags=["auth"], default_response_class=ORJSONResponse)
 
-# WATI (WhatsApp) configuration
-WATI_API_ENDPOINT = os.getenv("WATI_API_ENDPOINT")
-WATI_ACCESS_TOKEN = os.getenv("WATI_ACCESS_TOKEN")
+# Cookie lifetime matches the token; OTPs are valid for 10 minutes
+_ACCESS_TOKEN_MAX_AGE = ACCESS_TOKEN_EXPIRE_MINUTES * 60
+_OTP_TTL = timedelta(minutes=10)
 
-# --- JWT Helpers ---
+# Brute-force protection: per-account cap on wrong OTPs, plus request rate limits
+MAX_OTP_ATTEMPTS = 5
 
-def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
-    to_encode = data.copy()
-    expire = datetime.utcnow() + (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
-    to_encode.update({"exp": expire})
-    return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+async def client_account_identifier(request: Request) -> str:
+    """Rate-limit key: client IP + the email/phone being tried + route."""
+    # Never read X-Forwarded-For here: the client controls it. Behind a proxy,
+    # run uvicorn with --proxy-headers --forwarded-allow-ips=<proxy IPs> so
+    # request.client is rewritten only for trusted hops.
+    ip = request.client.host
+    try:
+        body = await request.json()
+    except Exception:
+        body = {}
+    if not isinstance(body, dict):
+        body = {}
+    account = body.get("email") or body.get("phone") or ""
+    return f"{ip}:{account}:{request.scope['path']}"
+
+# fastapi-limiter counts in fixed windows (not a token bucket), so a client can
+# spend up to twice the limit across a window boundary
+login_rate_limit = RateLimiter(times=5, minutes=1, identifier=client_account_identifier)
+otp_request_rate_limit = RateLimiter(times=3, minutes=5, identifier=client_account_identifier)
+
+# WATI (WhatsApp) configuration
+WATI_API_ENDPOINT = settings.wati_api_endpoint
+WATI_ACCESS_TOKEN = settings.wati_access_token
+WATI_HEADERS = {
+    "accept": "*/*",
+    "Authorization": WATI_ACCESS_TOKEN,
+    "Content-Type": "application/json-patch+json"
+}
 
-def verify_access_token(token: str) -> dict:
-    return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+# --- Auth dependency ---
 
-def get_current_user(request: Request, db: Session = Depends(get_db)) -> User:
+# Everything /profile shows; the password hash and OTP columns stay unloaded
+_PROFILE_COLUMNS = load_only(User.id, User.name, User.email, User.phone, User.is_verified, User.attempts)
+
+async def get_current_user(request: Request, db: AsyncSession = Depends(get_async_db)) -> User:
     token = request.cookies.get("access_token")
     if not token:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
@@ -60,14 +108,40 @@ def get_current_user(request: Request, db: Session = Depends(get_db)) -> User:
         sub = payload.get("sub")
         if not sub:
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
-    except JWTError:
+    except InvalidTokenError:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid or expired token")
-    user = db.query(User).filter(User.email == sub).first()
+    user = await db.scalar(select(User).options(_PROFILE_COLUMNS).where(User.email == sub))
     if not user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
     return user
 
 # --- Schemas ---
+
+# Validator patterns, compiled once
+_UPPER_RE = re.compile(r'[A-Z]')
+_LOWER_RE = re.compile(r'[a-z]')
+_DIGIT_RE = re.compile(r'\d')
+_SPECIAL_RE = re.compile(r'[^A-Za-z0-9]')
+# All password rules in one scan; the per-rule patterns only run on failure
+# to pick the error message.
+_STRONG_PASSWORD_RE = re.compile(r'(?=.*[A-Z])(?=.*[a-z])(?=.*\d)(?=.*[^A-Za-z0-9]).{8,}', re.DOTALL)
+
+def _is_e164(v: str) -> bool:
+    """'+' followed by 10-15 ASCII digits."""
+    digits = v[1:]
+    return 11 <= len(v) <= 16 and v[0] == '+' and digits.isascii() and digits.isdigit()
+
+@lru_cache(maxsize=4096)
+def _parse_and_format_e164(v: str) -> Optional[str]:
+    """Return `v` normalized to E.164, or None if it isn't a valid number."""
+    try:
+        num = phonenumbers.parse(v, None)
+    except phonenumbers.NumberParseException:
+        return None
+    if not phonenumbers.is_valid_number(num):
+        return None
+    return phonenumbers.format_number(num, phonenumbers.PhoneNumberFormat.E164)
+
 class SignupRequest(BaseModel):
     name: str
     email: EmailStr
@@ -76,27 +150,26 @@ class SignupRequest(BaseModel):
 
     @validator('phone')
     def validate_phone(cls, v):
-        if not re.match(r'^\+\d{10,15}$', v):
+        if not _is_e164(v):
             raise PydanticCustomError('phone.format', 'Phone must be in E.164 format (e.g. +12345678901)')
-        try:
-            num = phonenumbers.parse(v, None)
-            if not phonenumbers.is_valid_number(num):
-                raise PydanticCustomError('phone.invalid', 'Invalid phone number')
-        except phonenumbers.NumberParseException:
+        out = _parse_and_format_e164(v)
+        if out is None:
             raise PydanticCustomError('phone.invalid', 'Invalid phone number')
-        return phonenumbers.format_number(num, phonenumbers.PhoneNumberFormat.E164)
+        return out
 
     @validator('password')
     def validate_password(cls, v):
+        if _STRONG_PASSWORD_RE.match(v):
+            return v
         if len(v) < 8:
             raise PydanticCustomError('password.length', 'Password must be at least 8 characters long')
-        if not re.search(r'[A-Z]', v):
+        if not _UPPER_RE.search(v):
             raise PydanticCustomError('password.uppercase', 'Password must contain at least one uppercase letter')
-        if not re.search(r'[a-z]', v):
+        if not _LOWER_RE.search(v):
             raise PydanticCustomError('password.lowercase', 'Password must contain at least one lowercase letter')
-        if not re.search(r'\d', v):
+        if not _DIGIT_RE.search(v):
             raise PydanticCustomError('password.digit', 'Password must contain at least one digit')
-        if not re.search(r'[^A-Za-z0-9]', v):
+        if not _SPECIAL_RE.search(v):
             raise PydanticCustomError('password.special', 'Password must contain at least one special character')
         return v
 
@@ -105,13 +178,10 @@ class OTPRequest(BaseModel):
 
     @validator('phone')
     def validate_phone_otp(cls, v):
-        try:
-            pn = phonenumbers.parse(v, None)
-        except phonenumbers.NumberParseException:
-            raise PydanticCustomError('phone.invalid', 'Invalid phone number')
-        if not phonenumbers.is_valid_number(pn):
+        out = _parse_and_format_e164(v)
+        if out is None:
             raise PydanticCustomError('phone.invalid', 'Invalid phone number')
-        return phonenumbers.format_number(pn, phonenumbers.PhoneNumberFormat.E164)
+        return out
 
 class OTPVerifyRequest(BaseModel):
     phone: str
@@ -119,7 +189,7 @@ class OTPVerifyRequest(BaseModel):
 
     @validator('phone')
     def validate_phone_verify(cls, v):
-        if not re.match(r'^\+\d{10,15}$', v):
+        if not _is_e164(v):
             raise PydanticCustomError('phone.format', 'Phone must be in E.164 format')
         return v
 
@@ -138,13 +208,10 @@ class PasswordResetRequest(BaseModel):
 
     @validator('phone')
     def validate_phone_reset(cls, v):
-        try:
-            pn = phonenumbers.parse(v, None)
-        except phonenumbers.NumberParseException:
+        out = _parse_and_format_e164(v)
+        if out is None:
             raise PydanticCustomError('phone.invalid', 'Invalid phone number')
-        if not phonenumbers.is_valid_number(pn):
-            raise PydanticCustomError('phone.invalid', 'Invalid phone number')
-        return phonenumbers.format_number(pn, phonenumbers.PhoneNumberFormat.E164)
+        return out
 
 class PasswordReset(BaseModel):
     phone: str
@@ -171,42 +238,99 @@ class ProfileResponse(BaseModel):
     attempts: int
 
 # --- Helper: send_whatsapp_otp ---
-def send_whatsapp_otp(phone: str, otp: str) -> Dict[str, Any]:
+async def send_whatsapp_otp(phone: str, otp: str, now: datetime) -> None:
     url = f"{WATI_API_ENDPOINT}/api/v1/sendTemplateMessage?whatsappNumber={phone}"
     payload = {
         "template_name": "login_otp",
-        "broadcast_name": f"login_otp_{datetime.utcnow().strftime('%d%m%Y%H%M%S')}",
+        "broadcast_name": f"login_otp_{now.strftime('%d%m%Y%H%M%S')}",
         "parameters": [{"name": "1", "value": otp}]
     }
-    headers = {
-        "accept": "*/*",
-        "Authorization": WATI_ACCESS_TOKEN,
-        "Content-Type": "application/json-patch+json"
-    }
     try:
-        r = requests.post(url, json=payload, headers=headers, timeout=10)
+        r = await client.post(url, json=payload, headers=WATI_HEADERS, timeout=10)
         logger.info(f"WATI responded {r.status_code}: {r.text}")
         r.raise_for_status()
-    except requests.HTTPError:
+    except httpx.HTTPStatusError:
         logger.error(f"WATI error {r.status_code}: {r.text}")
         raise HTTPException(status_code=502, detail=f"WATI API error: {r.status_code} {r.text}")
     except Exception as e:
         logger.exception("Failed to send OTP")
         raise HTTPException(status_code=502, detail=f"Error sending OTP: {e}")
-    return r.json()
+
+async def send_otp_background(phone: str, otp: str, now: datetime) -> None:
+    # Runs after the response is sent; send_whatsapp_otp has already logged
+    # any failure, so don't let it surface as an unhandled task error.
+    try:
+        await send_whatsapp_otp(phone, otp, now)
+    except HTTPException:
+        pass
+
+# OTPs are stored as a keyed hash: a plain sha256 of a 4-digit code could be
+# reversed from a leaked table in 10k guesses. The key is derived from the
+# app secret for this one purpose, so it is never the JWT signing key itself.
+_OTP_HASH_KEY = hmac.new(settings.jwt_secret_key.encode(), b"otp-hash", hashlib.sha256).digest()
+
+def _hash_otp(otp: str) -> str:
+    return hmac.new(_OTP_HASH_KEY, otp.encode(), hashlib.sha256).hexdigest()
+
+def _otp_matches(user: User, otp: str) -> bool:
+    return hmac.compare_digest(user.otp_code or "", _hash_otp(otp))
+
+# OTP guesses are counted in Redis, so a brute-force burst costs an INCR per
+# attempt rather than a Postgres UPDATE + commit. The count is only written
+# to users.attempts once the account hits the limit.
+# Issuing a new OTP deliberately leaves the counter alone; otherwise "request
+# a code, guess 5 times, repeat" would walk the whole 4-digit space. The
+# counter is only cleared by a successful verification or by expiring.
+_OTP_ATTEMPTS_TTL = int(_OTP_TTL.total_seconds())
+
+def _otp_attempts_key(phone: str) -> str:
+    return f"otp_attempts:{phone}"
+
+async def _consume_attempt(phone: str) -> int:
+    """Count this guess before checking it and return the running total.
+
+    Incrementing first makes the check atomic: concurrent guesses each get a
+    distinct count, so a parallel burst can't all read "under the limit".
+    """
+    key = _otp_attempts_key(phone)
+    async with redis_client.pipeline(transaction=True) as pipe:
+        pipe.incr(key)
+        pipe.expire(key, _OTP_ATTEMPTS_TTL)
+        count, _ = await pipe.execute()
+    return count
+
+async def _clear_failed_attempts(phone: str) -> None:
+    await redis_client.delete(_otp_attempts_key(phone))
+
+async def _record_failed_attempt(db: AsyncSession, user: User, count: int) -> None:
+    if count >= MAX_OTP_ATTEMPTS:
+        await db.execute(
+            update(User)
+            .where(User.id == user.id)
+            .values(attempts=count)
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
 
 # --- Endpoints ---
 
-@router.post("/signup", status_code=status.HTTP_201_CREATED)
-def signup_endpoint(payload: SignupRequest, db: Session = Depends(get_db)):
-    existing = db.query(User)\
-        .filter((User.phone == payload.phone) | (User.email == payload.email))\
-        .first()
+@router.post("/signup", status_code=status.HTTP_201_CREATED, dependencies=[Depends(otp_request_rate_limit)])
+async def signup_endpoint(payload: SignupRequest, background_tasks: BackgroundTasks, db: AsyncSession = Depends(get_async_db)):
+    now = datetime.now(timezone.utc)
+    # Two single-column lookups so each can use its unique index
+    by_phone = await db.scalar(select(User).where(User.phone == payload.phone))
+    if by_phone and by_phone.email == payload.email:
+        by_email = by_phone
+    else:
+        by_email = await db.scalar(select(User).where(User.email == payload.email))
+    if by_phone and by_email and by_phone.id != by_email.id:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Phone and email belong to different accounts.")
+    existing = by_phone or by_email
     if existing and existing.is_verified:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="User already registered and verified.")
-    otp = str(random.randint(1000, 9999))
-    expiry = datetime.utcnow() + timedelta(minutes=10)
-    hashed = pwd_context.hash(payload.password)
+    otp = f"{secrets.randbelow(10000):04d}"
+    expiry = now + _OTP_TTL
+    hashed = await hash_password(payload.password)
     if not existing:
         user = User(
             name=payload.name,
@@ -214,7 +338,7 @@ def signup_endpoint(payload: SignupRequest, db: Session = Depends(get_db)):
             phone=payload.phone,
             password_hash=hashed,
             is_verified=False,
-            otp_code=otp,
+            otp_code=_hash_otp(otp),
             otp_expiry=expiry,
             attempts=0
         )
@@ -224,75 +348,96 @@ def signup_endpoint(payload: SignupRequest, db: Session = Depends(get_db)):
         existing.email = payload.email
         existing.phone = payload.phone
         existing.password_hash = hashed
-        existing.otp_code = otp
+        existing.otp_code = _hash_otp(otp)
         existing.otp_expiry = expiry
         existing.attempts = 0
-    db.commit()
-    send_whatsapp_otp(payload.phone, otp)
+    try:
+        await db.commit()
+    except IntegrityError:
+        # Lost a race with a concurrent signup for the same phone/email
+        await db.rollback()
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="User already registered.")
+    background_tasks.add_task(send_otp_background, payload.phone, otp, now)
     return {"status": "otp_sent"}
 
-@router.post("/verify-signup-otp")
-def verify_signup_otp(payload: OTPVerifyRequest, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.phone == payload.phone).first()
+@router.post("/verify-signup-otp", dependencies=[Depends(login_rate_limit)])
+async def verify_signup_otp(payload: OTPVerifyRequest, db: AsyncSession = Depends(get_async_db)):
+    now = datetime.now(timezone.utc)
+    user = await db.scalar(select(User).where(User.phone == payload.phone))
     if not user:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found.")
     if user.is_verified:
         return {"status": "already_verified"}
-    if datetime.utcnow() > user.otp_expiry:
+    if not user.otp_expiry or now > user.otp_expiry:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="OTP expired.")
-    if payload.otp != user.otp_code:
-        user.attempts += 1
-        db.commit()
+    attempt = await _consume_attempt(user.phone)
+    if attempt > MAX_OTP_ATTEMPTS:
+        raise HTTPException(status_code=status.HTTP_429_TOO_MANY_REQUESTS, detail="Too many failed attempts. Try again later.")
+    if not _otp_matches(user, payload.otp):
+        await _record_failed_attempt(db, user, attempt)
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid OTP.")
     user.is_verified = True
     user.otp_code = None
     user.otp_expiry = None
     user.attempts = 0
-    db.commit()
+    await db.commit()
+    await _clear_failed_attempts(user.phone)
     return {"status": "verified"}
 
-@router.post("/login/email")
-def login_email(payload: EmailLoginRequest, response: Response, db: Session=Depends(get_db)):
-    user=db.query(User).filter(User.email==payload.email).first()
-    if not user or not pwd_context.verify(payload.password,user.password_hash):
+@router.post("/login/email", dependencies=[Depends(login_rate_limit)])
+async def login_email(payload: EmailLoginRequest, response: Response, db: AsyncSession = Depends(get_async_db)):
+    user=await db.scalar(select(User).where(User.email==payload.email))
+    if not user or not await verify_password(payload.password,user.password_hash):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED,detail="Invalid credentials")
     if not user.is_verified:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN,detail="Account not verified")
+    # Re-hash hashes made with a different cost now that we have the plaintext
+    if pwd_context.needs_update(user.password_hash):
+        user.password_hash = await hash_password(payload.password)
+        await db.commit()
     token=create_access_token({"sub":user.email})
       # clear any old cookie, then set the new one
     response.delete_cookie("access_token", path="/")
-    response.set_cookie("access_token",token,httponly=True,secure=True,samesite="none",max_age=ACCESS_TOKEN_EXPIRE_MINUTES*60,path="/")
+    response.set_cookie("access_token",token,httponly=True,secure=True,samesite="none",max_age=_ACCESS_TOKEN_MAX_AGE,path="/")
     return{"status":"login_successful"}
 
-@router.post("/login/request-otp")
-def request_login_otp(payload: OTPRequest, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.phone == payload.phone).first()
+@router.post("/login/request-otp", dependencies=[Depends(otp_request_rate_limit)])
+async def request_login_otp(payload: OTPRequest, background_tasks: BackgroundTasks, db: AsyncSession = Depends(get_async_db)):
+    now = datetime.now(timezone.utc)
+    user = await db.scalar(select(User).where(User.phone == payload.phone))
     if not user:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Phone not registered.")
-    otp = str(random.randint(1000, 9999))
-    expiry = datetime.utcnow() + timedelta(minutes=10)
-    user.otp_code = otp
+    otp = f"{secrets.randbelow(10000):04d}"
+    expiry = now + _OTP_TTL
+    user.otp_code = _hash_otp(otp)
     user.otp_expiry = expiry
     user.attempts = 0
-    db.commit()
-    send_whatsapp_otp(payload.phone, otp)
+    await db.commit()
+    background_tasks.add_task(send_otp_background, payload.phone, otp, now)
     return {"status": "otp_sent"}
 
-@router.post("/login/verify-otp")
-def verify_login_otp(
+@router.post("/login/verify-otp", dependencies=[Depends(login_rate_limit)])
+async def verify_login_otp(
     payload: OTPVerifyRequest,
     response: Response,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    user = db.query(User).filter(User.phone == payload.phone).first()
+    now = datetime.now(timezone.utc)
+    user = await db.scalar(select(User).where(User.phone == payload.phone))
     if not user:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found.")
-    if datetime.utcnow() > user.otp_expiry:
+    if not user.otp_expiry or now > user.otp_expiry:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="OTP expired.")
-    if payload.otp != user.otp_code:
-        user.attempts += 1
-        db.commit()
+    attempt = await _consume_attempt(user.phone)
+    if attempt > MAX_OTP_ATTEMPTS:
+        raise HTTPException(status_code=status.HTTP_429_TOO_MANY_REQUESTS, detail="Too many failed attempts. Try again later.")
+    if not _otp_matches(user, payload.otp):
+        await _record_failed_attempt(db, user, attempt)
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid OTP.")
+    if user.attempts:
+        user.attempts = 0
+        await db.commit()
+    await _clear_failed_attempts(user.phone)
     token = create_access_token({"sub": user.email})
       # clear any old cookie, then set the new one
     response.delete_cookie("access_token", path="/")
@@ -302,7 +447,7 @@ def verify_login_otp(
         httponly=True,
         secure=True,
         samesite="none",
-        max_age=ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+        max_age=_ACCESS_TOKEN_MAX_AGE,
         path="/",
     )
     return {"status": "login_successful"}
@@ -321,36 +466,41 @@ def logout(response: Response):
     )
     return {"status": "logged_out"}
 
-@router.post("/request-password-reset")
-def request_password_reset(payload: PasswordResetRequest, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.phone == payload.phone).first()
+@router.post("/request-password-reset", dependencies=[Depends(otp_request_rate_limit)])
+async def request_password_reset(payload: PasswordResetRequest, background_tasks: BackgroundTasks, db: AsyncSession = Depends(get_async_db)):
+    now = datetime.now(timezone.utc)
+    user = await db.scalar(select(User).where(User.phone == payload.phone))
     if not user:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Account not found.")
-    otp = f"{random.randint(1000, 9999):04d}"
-    expiry = datetime.utcnow() + timedelta(minutes=10)
-    user.otp_code = otp
+    otp = f"{secrets.randbelow(10000):04d}"
+    expiry = now + _OTP_TTL
+    user.otp_code = _hash_otp(otp)
     user.otp_expiry = expiry
     user.attempts = 0
-    db.commit()
-    send_whatsapp_otp(payload.phone, otp)
+    await db.commit()
+    background_tasks.add_task(send_otp_background, payload.phone, otp, now)
     return {"status": "otp_sent"}
 
-@router.post("/reset-password")
-def reset_password(payload: PasswordReset, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.phone == payload.phone).first()
+@router.post("/reset-password", dependencies=[Depends(login_rate_limit)])
+async def reset_password(payload: PasswordReset, db: AsyncSession = Depends(get_async_db)):
+    now = datetime.now(timezone.utc)
+    user = await db.scalar(select(User).where(User.phone == payload.phone))
     if not user or not user.otp_expiry:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found or no OTP requested.")
-    if datetime.utcnow() > user.otp_expiry:
+    if now > user.otp_expiry:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="OTP expired.")
-    if payload.otp != user.otp_code:
-        user.attempts += 1
-        db.commit()
+    attempt = await _consume_attempt(user.phone)
+    if attempt > MAX_OTP_ATTEMPTS:
+        raise HTTPException(status_code=status.HTTP_429_TOO_MANY_REQUESTS, detail="Too many failed attempts. Try again later.")
+    if not _otp_matches(user, payload.otp):
+        await _record_failed_attempt(db, user, attempt)
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid OTP.")
-    user.password_hash = pwd_context.hash(payload.new_password)
+    user.password_hash = await hash_password(payload.new_password)
     user.otp_code = None
     user.otp_expiry = None
     user.attempts = 0
-    db.commit()
+    await db.commit()
+    await _clear_failed_attempts(user.phone)
     return {"status": "password_reset_successful"}
 
 @router.get("/profile", response_model=ProfileResponse)
@@ -1,55 +1,206 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from fastapi_limiter import FastAPILimiter
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import desc, asc, func, and_, or_
+import base64
+import binascii
+import hashlib
+import logging
+
+import orjson
+import redis
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.responses import ORJSONResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload, selectinload
+from sqlalchemy import select, desc, asc, func, and_, or_, text, update, false
 from typing import List, Optional
-from datetime import datetime, timedelta
+from datetime import datetime
 from fastapi_limiter.depends import RateLimiter
-from utils.db import get_db
+from utils.db import get_async_db
+from utils.redis_client import redis_client
 from utils.security import get_current_user
-from models import User, ForumPost, ForumComment, ForumCategory, post_likes, comment_likes
+from models import User, ForumPost, ForumComment, ForumCategory
+# Response schemas are aliased so they don't shadow the ORM models above
 from schemas.forum import (
-    ForumPostCreate, ForumPostUpdate, ForumPost, ForumPostList,
-    ForumCommentCreate, ForumCommentUpdate, ForumComment,
-    ForumCategoryCreate, ForumCategoryUpdate, ForumCategory,
+    ForumPostCreate, ForumPostUpdate, ForumPost as ForumPostSchema, ForumPostList,
+    ForumCommentCreate, ForumCommentUpdate, ForumComment as ForumCommentSchema,
+    ForumCategoryCreate, ForumCategory as ForumCategorySchema,
     ForumStats
 )
 
-router = APIRouter(prefix="/forum", tags=["forum"])
+router = APIRouter(prefix="/forum", tags=["forum"], default_response_class=ORJSONResponse)
+
+logger = logging.getLogger(__name__)
+
+# Number of comment previews shown per post in listings
+LATEST_COMMENTS_PER_POST = 3
+
+# Filtered post totals are cached briefly; an exact live count isn't needed
+POST_TOTAL_CACHE_TTL = 30
+
+# /forum/stats is three COUNT(*)s plus a query; serve it from Redis in between
+STATS_CACHE_KEY = "forum:stats"
+STATS_CACHE_TTL = 30
+
+
+async def _invalidate_stats() -> None:
+    # Called after a commit, so a Redis failure must not fail the request;
+    # the stale entry expires within STATS_CACHE_TTL anyway
+    try:
+        await redis_client.delete(STATS_CACHE_KEY)
+    except redis.RedisError:
+        logger.warning("Stats cache invalidation failed", exc_info=True)
+
+def _encode_cursor(post, pinned_first: bool) -> str:
+    created_at = post.created_at.isoformat() if post.created_at is not None else None
+    keys = [created_at, post.id]
+    if pinned_first:
+        keys.insert(0, bool(post.is_pinned))
+    return base64.urlsafe_b64encode(orjson.dumps(keys)).decode()
+
+def _decode_cursor(cursor: str, pinned_first: bool) -> list:
+    try:
+        keys = orjson.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (binascii.Error, orjson.JSONDecodeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(keys, list) or len(keys) != (3 if pinned_first else 2):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    try:
+        if pinned_first:
+            keys[0] = bool(keys[0])
+        if keys[-2] is not None:
+            keys[-2] = datetime.fromisoformat(keys[-2])
+        keys[-1] = int(keys[-1])
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return keys
+
+def _keyset_after(keys):
+    """
+    Row-comparison predicate for rows after `keys`, a list of
+    (column, value, descending, nullable). Nullable columns follow Postgres'
+    default ordering, where NULL sorts as the largest value.
+    """
+    clause = None
+    for column, value, descending, nullable in reversed(keys):
+        if value is None:
+            step = column.isnot(None) if descending else false()
+            same = column.is_(None)
+        else:
+            step = column < value if descending else column > value
+            if nullable and not descending:
+                step = or_(step, column.is_(None))
+            same = column == value
+        clause = step if clause is None else or_(step, and_(same, clause))
+    return clause
+
+# Like toggles in one round-trip: insert the like if it's missing, otherwise
+# delete it, and move the counter by the difference. Both CTEs see the same
+# snapshot, so exactly one of them touches a row. No row back means the
+# target doesn't exist or is deleted.
+TOGGLE_POST_LIKE_SQL = text("""
+    WITH target AS (
+        SELECT id FROM forum_posts WHERE id = :target_id AND is_deleted = false
+    ), ins AS (
+        INSERT INTO post_likes (user_id, post_id)
+        SELECT :user_id, id FROM target
+        ON CONFLICT DO NOTHING
+        RETURNING 1
+    ), del AS (
+        DELETE FROM post_likes
+        WHERE user_id = :user_id AND post_id IN (SELECT id FROM target)
+          AND NOT EXISTS (SELECT 1 FROM ins)
+        RETURNING 1
+    )
+    UPDATE forum_posts
+    SET like_count = like_count + (SELECT count(*) FROM ins) - (SELECT count(*) FROM del)
+    WHERE id IN (SELECT id FROM target)
+    RETURNING like_count, (SELECT count(*) FROM ins) > 0 AS liked
+""")
+
+TOGGLE_COMMENT_LIKE_SQL = text("""
+    WITH target AS (
+        SELECT id FROM forum_comments WHERE id = :target_id AND is_deleted = false
+    ), ins AS (
+        INSERT INTO comment_likes (user_id, comment_id)
+        SELECT :user_id, id FROM target
+        ON CONFLICT DO NOTHING
+        RETURNING 1
+    ), del AS (
+        DELETE FROM comment_likes
+        WHERE user_id = :user_id AND comment_id IN (SELECT id FROM target)
+          AND NOT EXISTS (SELECT 1 FROM ins)
+        RETURNING 1
+    )
+    UPDATE forum_comments
+    SET like_count = like_count + (SELECT count(*) FROM ins) - (SELECT count(*) FROM del)
+    WHERE id IN (SELECT id FROM target)
+    RETURNING like_count, (SELECT count(*) FROM ins) > 0 AS liked
+""")
+
+# A post page shows its first COMMENT_ROOTS_PER_POST top-level comments and
+# replies down to COMMENT_MAX_DEPTH levels below them
+COMMENT_ROOTS_PER_POST = 10
+COMMENT_MAX_DEPTH = 3
+
+# Fetch the visible part of a post's comment tree in one query, so the work is
+# bounded by what's rendered rather than by the post's total comment count.
+# Rows come back shallowest first, so a parent always precedes its replies.
+COMMENT_TREE_SQL = text("""
+    WITH RECURSIVE thread AS (
+        SELECT * FROM (
+            SELECT c.id, c.content, c.author_id, c.post_id, c.parent_id, c.is_deleted,
+                   c.created_at, c.updated_at, c.like_count, 0 AS depth
+            FROM forum_comments c
+            WHERE c.post_id = :post_id AND c.parent_id IS NULL AND c.is_deleted = false
+            ORDER BY c.created_at, c.id
+            LIMIT :root_limit
+        ) roots
+        UNION ALL
+        SELECT c.id, c.content, c.author_id, c.post_id, c.parent_id, c.is_deleted,
+               c.created_at, c.updated_at, c.like_count, t.depth + 1
+        FROM forum_comments c
+        JOIN thread t ON c.parent_id = t.id
+        WHERE c.is_deleted = false AND t.depth < :max_depth
+    )
+    SELECT thread.*, users.name AS author_username
+    FROM thread
+    LEFT JOIN users ON users.id = thread.author_id
+    ORDER BY thread.depth, thread.created_at, thread.id
+""")
 
 # Category endpoints
-@router.get("/categories", response_model=List[ForumCategory])
+@router.get("/categories", response_model=List[ForumCategorySchema])
 async def get_categories(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     include_inactive: bool = False
 ):
     """Get all forum categories with post counts."""
-    query = db.query(ForumCategory)
+    # One grouped query instead of a COUNT per category
+    stmt = select(ForumCategory, func.count(ForumPost.id)).outerjoin(
+        ForumPost,
+        and_(ForumPost.category_id == ForumCategory.id, ForumPost.is_deleted == False)
+    )
     if not include_inactive:
-        query = query.filter(ForumCategory.is_active == True)
+        stmt = stmt.where(ForumCategory.is_active == True)
     
-    categories = query.order_by(ForumCategory.name).all()
+    rows = (await db.execute(stmt.group_by(ForumCategory.id).order_by(ForumCategory.name))).all()
     
-    # Add post count for each category
-    for category in categories:
-        category.post_count = db.query(ForumPost).filter(
-            ForumPost.category_id == category.id,
-            ForumPost.is_deleted == False
-        ).count()
+    categories = []
+    for category, post_count in rows:
+        category.post_count = post_count
+        categories.append(category)
     
     return categories
 
-@router.post("/categories", response_model=ForumCategory)
+@router.post("/categories", response_model=ForumCategorySchema)
 async def create_category(
     category: ForumCategoryCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Create a new forum category (admin only)."""
     # Add admin check here if needed
     
     # Check if category name already exists
-    existing = db.query(ForumCategory).filter(ForumCategory.name == category.name).first()
+    existing = await db.scalar(select(ForumCategory).where(ForumCategory.name == category.name))
     if existing:
         raise HTTPException(
             status_code=400,
@@ -58,77 +209,140 @@ async def create_category(
     
     db_category = ForumCategory(**category.dict())
     db.add(db_category)
-    db.commit()
-    db.refresh(db_category)
+    await db.commit()
+    await db.refresh(db_category)
     
     return db_category
 
 # Post endpoints
 @router.get("/posts", response_model=ForumPostList)
 async def get_posts(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     category_id: Optional[int] = Query(None, description="Filter by category"),
     search: Optional[str] = Query(None, description="Search in title and content"),
-    sort_by: str = Query("created_at", description="Sort by: created_at, updated_at, likes, comments"),
+    match: str = Query("words", description="Search mode: words (full-text), substring"),
+    sort_by: str = Query("created_at", description="Sort by: created_at, updated_at, likes, comments, relevance"),
     sort_order: str = Query("desc", description="Sort order: asc, desc"),
     page: int = Query(1, ge=1, description="Page number"),
     per_page: int = Query(20, ge=1, le=100, description="Items per page"),
-    pinned_first: bool = Query(True, description="Show pinned posts first")
+    pinned_first: bool = Query(True, description="Show pinned posts first"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page (created_at sort only)"),
+    include_total: bool = Query(False, description="Also return the total number of matching posts")
 ):
     """Get paginated forum posts with filtering and sorting."""
     
     # Base query
-    query = db.query(ForumPost).filter(ForumPost.is_deleted == False)
+    query = select(ForumPost).where(ForumPost.is_deleted == False)
     
     # Apply filters
     if category_id:
-        query = query.filter(ForumPost.category_id == category_id)
-    
-    if search:
-        search_filter = or_(
-            ForumPost.title.ilike(f"%{search}%"),
-            ForumPost.content.ilike(f"%{search}%")
-        )
-        query = query.filter(search_filter)
-    
-    # Count total before pagination
-    total = query.count()
+        query = query.where(ForumPost.category_id == category_id)
+    
+    ts_query = None
+    if search and match == "substring":
+        # Literal %term% match; ILIKE (not lower() LIKE) so the trigram indexes apply
+        pattern = "%" + search.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+        query = query.where(or_(
+            ForumPost.title.ilike(pattern, escape="\\"),
+            ForumPost.content.ilike(pattern, escape="\\")
+        ))
+    elif search:
+        # Served by the GIN index on search_tsv instead of a %term% scan
+        ts_query = func.plainto_tsquery("english", search)
+        query = query.where(ForumPost.search_tsv.op("@@")(ts_query))
+    
+    # Total is opt-in: it re-runs the whole filtered query
+    total = None
+    if include_total:
+        filters = orjson.dumps([category_id, match if search else None, search])
+        cache_key = f"forum:post_total:{hashlib.sha1(filters).hexdigest()}"
+        # The cache is optional: if Redis is unavailable, count uncached
+        try:
+            cached = await redis_client.get(cache_key)
+        except redis.RedisError:
+            logger.warning("Post total cache read failed", exc_info=True)
+            cached = None
+        if cached is not None:
+            total = int(cached)
+        else:
+            total = await db.scalar(select(func.count()).select_from(query.subquery()))
+            try:
+                await redis_client.set(cache_key, total, ex=POST_TOTAL_CACHE_TTL)
+            except redis.RedisError:
+                logger.warning("Post total cache write failed", exc_info=True)
     
     # Apply sorting
+    descending = sort_order == "desc"
+    keyset = sort_by == "created_at"
     if sort_by == "created_at":
         order_col = ForumPost.created_at
     elif sort_by == "updated_at":
         order_col = ForumPost.updated_at
     elif sort_by == "likes":
-        # Join with likes table for sorting
-        query = query.outerjoin(post_likes).group_by(ForumPost.id)
-        order_col = func.count(post_likes.c.user_id)
+        # Denormalized counters: no join/GROUP BY needed to sort
+        order_col = ForumPost.like_count
     elif sort_by == "comments":
-        query = query.outerjoin(ForumComment).group_by(ForumPost.id)
-        order_col = func.count(ForumComment.id)
+        order_col = ForumPost.comment_count
+    elif sort_by == "relevance" and ts_query is not None:
+        order_col = func.ts_rank_cd(ForumPost.search_tsv, ts_query)
     else:
         order_col = ForumPost.created_at
+        keyset = True
     
-    if sort_order == "desc":
-        order_col = desc(order_col)
-    else:
-        order_col = asc(order_col)
-    
-    # Handle pinned posts
+    # id breaks ties so the order (and any cursor) is stable
+    direction = desc if descending else asc
+    order_by = [direction(order_col), direction(ForumPost.id)]
     if pinned_first:
-        query = query.order_by(desc(ForumPost.is_pinned), order_col)
+        order_by.insert(0, desc(ForumPost.is_pinned))
+    query = query.order_by(*order_by)
+    
+    # Keyset pagination: seek past the cursor instead of OFFSET-scanning
+    if cursor and keyset:
+        cursor_keys = _decode_cursor(cursor, pinned_first)
+        keys = [
+            (ForumPost.created_at, cursor_keys[-2], descending, True),
+            (ForumPost.id, cursor_keys[-1], descending, False),
+        ]
+        if pinned_first:
+            keys.insert(0, (ForumPost.is_pinned, cursor_keys[0], True, False))
+        query = query.where(_keyset_after(keys))
+    elif cursor:
+        raise HTTPException(status_code=400, detail="Cursor pagination is only supported for created_at sorting")
     else:
-        query = query.order_by(order_col)
-    
-    # Apply pagination
-    offset = (page - 1) * per_page
-    posts = query.offset(offset).limit(per_page).options(
-        joinedload(ForumPost.author),
-        joinedload(ForumPost.category),
-        joinedload(ForumPost.comments).joinedload(ForumComment.author)
-    ).all()
-    
-    # Enrich posts with additional data
+        query = query.offset((page - 1) * per_page)
+    
+    rows = (await db.scalars(query.limit(per_page + 1).options(
+        selectinload(ForumPost.author),
+        selectinload(ForumPost.category)
+    ))).all()
+    has_next = len(rows) > per_page
+    posts = rows[:per_page]
+    next_cursor = _encode_cursor(posts[-1], pinned_first) if keyset and has_next else None
+    
+    # Newest non-deleted comments for the whole page in one query, ranked per
+    # post in SQL rather than loading every comment and sorting in Python
+    latest_by_post = {post.id: [] for post in posts}
+    if latest_by_post:
+        rank = func.row_number().over(
+            partition_by=ForumComment.post_id,
+            order_by=desc(ForumComment.created_at)
+        ).label("rank")
+        ranked = select(ForumComment.id.label("id"), rank).where(
+            ForumComment.post_id.in_(list(latest_by_post)),
+            ForumComment.is_deleted == False
+        ).subquery()
+        latest = (await db.scalars(select(ForumComment).join(
+            ranked, ranked.c.id == ForumComment.id
+        ).where(
+            ranked.c.rank <= LATEST_COMMENTS_PER_POST
+        ).options(
+            selectinload(ForumComment.author)
+        ).order_by(ForumComment.post_id, desc(ForumComment.created_at)))).all()
+        for comment in latest:
+            latest_by_post[comment.post_id].append(comment)
+    
+    # Plain dicts straight to orjson: the hot listing skips building and
+    # re-validating ForumPost/ForumComment models for every row
     enriched_posts = []
     for post in posts:
         post_dict = {
@@ -145,13 +359,13 @@ async def get_posts(
             "updated_at": post.updated_at,
             "like_count": post.like_count,
             "comment_count": post.comment_count,
-            "author_username": post.author.username if post.author else "Unknown",
+            "author_username": post.author.name if post.author else "Unknown",
             "category_name": post.category.name if post.category else "Unknown",
             "latest_comments": [
                 {
                     "id": comment.id,
                     "content": comment.content[:100] + "..." if len(comment.content) > 100 else comment.content,
-                    "author_username": comment.author.username if comment.author else "Unknown",
+                    "author_username": comment.author.name if comment.author else "Unknown",
                     "created_at": comment.created_at,
                     "author_id": comment.author_id,
                     "post_id": comment.post_id,
@@ -161,136 +375,125 @@ async def get_posts(
                     "like_count": comment.like_count,
                     "replies": []
                 }
-                for comment in sorted(post.comments, key=lambda x: x.created_at, reverse=True)[:3]
-                if not comment.is_deleted
+                for comment in latest_by_post[post.id]
             ]
         }
-        enriched_posts.append(ForumPost(**post_dict))
-    
-    return ForumPostList(
-        posts=enriched_posts,
-        total=total,
-        page=page,
-        per_page=per_page,
-        has_next=page * per_page < total,
-        has_prev=page > 1
-    )
+        enriched_posts.append(post_dict)
+    
+    return ORJSONResponse({
+        "posts": enriched_posts,
+        "total": total,
+        "page": page,
+        "per_page": per_page,
+        "has_next": has_next,
+        "has_prev": bool(cursor) or page > 1,
+        "next_cursor": next_cursor
+    })
 
-@router.post("/posts", response_model=ForumPost, dependencies=[Depends(RateLimiter(times=5, seconds=60))])
+@router.post("/posts", response_model=ForumPostSchema, dependencies=[Depends(RateLimiter(times=5, seconds=60))])
 async def create_post(
     post: ForumPostCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Create a new forum post."""
     
     # Verify category exists
-    category = db.query(ForumCategory).filter(
+    category = await db.scalar(select(ForumCategory).where(
         ForumCategory.id == post.category_id,
         ForumCategory.is_active == True
-    ).first()
+    ))
     if not category:
         raise HTTPException(status_code=404, detail="Category not found")
     
     db_post = ForumPost(**post.dict(), author_id=current_user.id)
     db.add(db_post)
-    db.commit()
-    db.refresh(db_post)
+    await db.commit()
+    await _invalidate_stats()
     
-    # Load relationships for response
-    db_post = db.query(ForumPost).options(
+    # Reload with relationships for the response (no lazy loads under asyncio)
+    db_post = await db.scalar(select(ForumPost).options(
         joinedload(ForumPost.author),
         joinedload(ForumPost.category)
-    ).filter(ForumPost.id == db_post.id).first()
+    ).where(ForumPost.id == db_post.id).execution_options(populate_existing=True))
     
-    return ForumPost(
+    return ForumPostSchema(
         **db_post.__dict__,
-        author_username=db_post.author.username,
+        author_username=db_post.author.name,
         category_name=db_post.category.name,
-        like_count=0,
-        comment_count=0,
         latest_comments=[]
     )
 
-@router.get("/posts/{post_id}", response_model=ForumPost)
+@router.get("/posts/{post_id}", response_model=ForumPostSchema)
 async def get_post(
     post_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: Optional[User] = Depends(get_current_user)
 ):
     """Get a specific forum post with comments."""
     
-    post = db.query(ForumPost).filter(
-        ForumPost.id == post_id,
-        ForumPost.is_deleted == False
-    ).options(
-        joinedload(ForumPost.author),
-        joinedload(ForumPost.category),
-        joinedload(ForumPost.comments).joinedload(ForumComment.author)
-    ).first()
+    # Count the view and fetch the post in one atomic UPDATE ... RETURNING,
+    # instead of a SELECT followed by a read-modify-write of view_count
+    post = (await db.scalars(
+        update(ForumPost)
+        .where(ForumPost.id == post_id, ForumPost.is_deleted == False)
+        .values(view_count=ForumPost.view_count + 1)
+        .returning(ForumPost)
+        .options(selectinload(ForumPost.author), selectinload(ForumPost.category))
+        .execution_options(populate_existing=True)
+    )).first()
     
     if not post:
         raise HTTPException(status_code=404, detail="Post not found")
     
-    # Increment view count
-    post.view_count += 1
-    db.commit()
-    
-    # Get comments with proper nesting
-    comments = db.query(ForumComment).filter(
-        ForumComment.post_id == post_id,
-        ForumComment.is_deleted == False
-    ).options(joinedload(ForumComment.author)).all()
+    comments = await db.execute(COMMENT_TREE_SQL, {
+        "post_id": post_id,
+        "root_limit": COMMENT_ROOTS_PER_POST,
+        "max_depth": COMMENT_MAX_DEPTH,
+    })
     
     # Organize comments into nested structure
     comment_dict = {}
     root_comments = []
     
-    for comment in comments:
-        comment_data = {
-            "id": comment.id,
-            "content": comment.content,
-            "author_id": comment.author_id,
-            "post_id": comment.post_id,
-            "parent_id": comment.parent_id,
-            "is_deleted": comment.is_deleted,
-            "created_at": comment.created_at,
-            "updated_at": comment.updated_at,
-            "like_count": comment.like_count,
-            "author_username": comment.author.username if comment.author else "Unknown",
-            "replies": []
-        }
+    for comment in comments.mappings():
+        comment_data = dict(comment)
+        del comment_data["depth"]
+        comment_data["author_username"] = comment_data["author_username"] or "Unknown"
+        comment_data["replies"] = []
         
-        comment_dict[comment.id] = comment_data
+        comment_dict[comment_data["id"]] = comment_data
         
-        if comment.parent_id is None:
+        if comment_data["parent_id"] is None:
             root_comments.append(comment_data)
         else:
-            if comment.parent_id in comment_dict:
-                comment_dict[comment.parent_id]["replies"].append(comment_data)
+            comment_dict[comment_data["parent_id"]]["replies"].append(comment_data)
     
-    return ForumPost(
+    response = ForumPostSchema(
         **post.__dict__,
-        author_username=post.author.username,
+        author_username=post.author.name,
         category_name=post.category.name,
-        like_count=post.like_count,
-        comment_count=len(comments),
-        latest_comments=[ForumComment(**comment) for comment in root_comments[:10]]
+        latest_comments=[ForumCommentSchema(**comment) for comment in root_comments]
     )
+    await db.commit()
+    return response
 
-@router.put("/posts/{post_id}", response_model=ForumPost)
+@router.put("/posts/{post_id}", response_model=ForumPostSchema)
 async def update_post(
     post_id: int,
     post_update: ForumPostUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Update a forum post (author only)."""
     
-    post = db.query(ForumPost).filter(
+    post = await db.scalar(select(ForumPost).options(
+        joinedload(ForumPost.author),
+        joinedload(ForumPost.category)
+    ).where(
         ForumPost.id == post_id,
         ForumPost.is_deleted == False
-    ).first()
+    ))
     
     if not post:
         raise HTTPException(status_code=404, detail="Post not found")
@@ -307,20 +510,28 @@ async def update_post(
         setattr(post, field, value)
     
     post.updated_at = datetime.utcnow()
-    db.commit()
-    db.refresh(post)
-    
-    return await get_post(post_id, db, current_user)
+    await db.commit()
+    if "category_id" in update_data:
+        await db.refresh(post, ["category"])
+
+    # Answer from the post already in hand; going through get_post would
+    # reload everything and count the edit as a view
+    return ForumPostSchema(
+        **post.__dict__,
+        author_username=post.author.name,
+        category_name=post.category.name,
+        latest_comments=[]
+    )
 
 @router.delete("/posts/{post_id}")
 async def delete_post(
     post_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Delete a forum post (author only)."""
     
-    post = db.query(ForumPost).filter(ForumPost.id == post_id).first()
+    post = await db.get(ForumPost, post_id)
     
     if not post:
         raise HTTPException(status_code=404, detail="Post not found")
@@ -329,25 +540,26 @@ async def delete_post(
         raise HTTPException(status_code=403, detail="Not authorized to delete this post")
     
     post.is_deleted = True
-    db.commit()
+    await db.commit()
+    await _invalidate_stats()
     
     return {"message": "Post deleted successfully"}
 
 # Comment endpoints
-@router.post("/posts/{post_id}/comments", response_model=ForumComment)
+@router.post("/posts/{post_id}/comments", response_model=ForumCommentSchema)
 async def create_comment(
     post_id: int,
     comment: ForumCommentCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Create a new comment on a post."""
     
     # Verify post exists and is not locked
-    post = db.query(ForumPost).filter(
+    post = await db.scalar(select(ForumPost).where(
         ForumPost.id == post_id,
         ForumPost.is_deleted == False
-    ).first()
+    ))
     
     if not post:
         raise HTTPException(status_code=404, detail="Post not found")
@@ -357,11 +569,11 @@ async def create_comment(
     
     # Verify parent comment exists if specified
     if comment.parent_id:
-        parent = db.query(ForumComment).filter(
+        parent = await db.scalar(select(ForumComment).where(
             ForumComment.id == comment.parent_id,
             ForumComment.post_id == post_id,
             ForumComment.is_deleted == False
-        ).first()
+        ))
         if not parent:
             raise HTTPException(status_code=404, detail="Parent comment not found")
     
@@ -371,29 +583,30 @@ async def create_comment(
         post_id=post_id
     )
     db.add(db_comment)
-    db.commit()
-    db.refresh(db_comment)
+    post.comment_count = ForumPost.comment_count + 1
+    await db.commit()
+    await _invalidate_stats()
+    await db.refresh(db_comment)
     
-    return ForumComment(
+    return ForumCommentSchema(
         **db_comment.__dict__,
-        author_username=current_user.username,
-        like_count=0,
+        author_username=current_user.name,
         replies=[]
     )
 
-@router.put("/comments/{comment_id}", response_model=ForumComment)
+@router.put("/comments/{comment_id}", response_model=ForumCommentSchema)
 async def update_comment(
     comment_id: int,
     comment_update: ForumCommentUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Update a comment (author only)."""
     
-    comment = db.query(ForumComment).filter(
+    comment = await db.scalar(select(ForumComment).where(
         ForumComment.id == comment_id,
         ForumComment.is_deleted == False
-    ).first()
+    ))
     
     if not comment:
         raise HTTPException(status_code=404, detail="Comment not found")
@@ -402,7 +615,7 @@ async def update_comment(
         raise HTTPException(status_code=403, detail="Not authorized to edit this comment")
     
     # Check if post is locked
-    post = db.query(ForumPost).filter(ForumPost.id == comment.post_id).first()
+    post = await db.get(ForumPost, comment.post_id)
     if post and post.is_locked:
         raise HTTPException(status_code=400, detail="Cannot edit comment on locked post")
     
@@ -412,25 +625,24 @@ async def update_comment(
         setattr(comment, field, value)
     
     comment.updated_at = datetime.utcnow()
-    db.commit()
-    db.refresh(comment)
+    await db.commit()
+    await db.refresh(comment)
     
-    return ForumComment(
+    return ForumCommentSchema(
         **comment.__dict__,
-        author_username=current_user.username,
-        like_count=comment.like_count,
+        author_username=current_user.name,
         replies=[]
     )
 
 @router.delete("/comments/{comment_id}")
 async def delete_comment(
     comment_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Delete a comment (author only)."""
     
-    comment = db.query(ForumComment).filter(ForumComment.id == comment_id).first()
+    comment = await db.get(ForumComment, comment_id)
     
     if not comment:
         raise HTTPException(status_code=404, detail="Comment not found")
@@ -438,8 +650,16 @@ async def delete_comment(
     if comment.author_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not authorized to delete this comment")
     
-    comment.is_deleted = True
-    db.commit()
+    if not comment.is_deleted:
+        comment.is_deleted = True
+        await db.execute(
+            update(ForumPost)
+            .where(ForumPost.id == comment.post_id)
+            .values(comment_count=ForumPost.comment_count - 1)
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+        await _invalidate_stats()
     
     return {"message": "Comment deleted successfully"}
 
@@ -447,134 +667,82 @@ async def delete_comment(
 @router.post("/posts/{post_id}/like")
 async def toggle_post_like(
     post_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Toggle like on a post."""
     
-    post = db.query(ForumPost).filter(
-        ForumPost.id == post_id,
-        ForumPost.is_deleted == False
-    ).first()
-    
-    if not post:
+    row = (await db.execute(
+        TOGGLE_POST_LIKE_SQL, {"target_id": post_id, "user_id": current_user.id}
+    )).first()
+    if not row:
+        await db.rollback()
         raise HTTPException(status_code=404, detail="Post not found")
+    await db.commit()
     
-    # Check if user already liked the post
-    existing_like = db.query(post_likes).filter(
-        post_likes.c.user_id == current_user.id,
-        post_likes.c.post_id == post_id
-    ).first()
-    
-    if existing_like:
-        # Unlike
-        db.execute(
-            post_likes.delete().where(
-                and_(
-                    post_likes.c.user_id == current_user.id,
-                    post_likes.c.post_id == post_id
-                )
-            )
-        )
-        liked = False
-    else:
-        # Like
-        db.execute(
-            post_likes.insert().values(
-                user_id=current_user.id,
-                post_id=post_id
-            )
-        )
-        liked = True
-    
-    db.commit()
-    
-    # Get updated like count
-    like_count = db.query(post_likes).filter(post_likes.c.post_id == post_id).count()
-    
-    return {"liked": liked, "like_count": like_count}
+    return {"liked": row.liked, "like_count": row.like_count}
 
 @router.post("/comments/{comment_id}/like")
 async def toggle_comment_like(
     comment_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Toggle like on a comment."""
     
-    comment = db.query(ForumComment).filter(
-        ForumComment.id == comment_id,
-        ForumComment.is_deleted == False
-    ).first()
-    
-    if not comment:
+    row = (await db.execute(
+        TOGGLE_COMMENT_LIKE_SQL, {"target_id": comment_id, "user_id": current_user.id}
+    )).first()
+    if not row:
+        await db.rollback()
         raise HTTPException(status_code=404, detail="Comment not found")
+    await db.commit()
     
-    # Check if user already liked the comment
-    existing_like = db.query(comment_likes).filter(
-        comment_likes.c.user_id == current_user.id,
-        comment_likes.c.comment_id == comment_id
-    ).first()
-    
-    if existing_like:
-        # Unlike
-        db.execute(
-            comment_likes.delete().where(
-                and_(
-                    comment_likes.c.user_id == current_user.id,
-                    comment_likes.c.comment_id == comment_id
-                )
-            )
-        )
-        liked = False
-    else:
-        # Like
-        db.execute(
-            comment_likes.insert().values(
-                user_id=current_user.id,
-                comment_id=comment_id
-            )
-        )
-        liked = True
-    
-    db.commit()
-    
-    # Get updated like count
-    like_count = db.query(comment_likes).filter(comment_likes.c.comment_id == comment_id).count()
-    
-    return {"liked": liked, "like_count": like_count}
+    return {"liked": row.liked, "like_count": row.like_count}
 
 # Forum statistics
 @router.get("/stats", response_model=ForumStats)
-async def get_forum_stats(db: Session = Depends(get_db)):
+async def get_forum_stats(db: AsyncSession = Depends(get_async_db)):
     """Get forum statistics."""
     
-    total_posts = db.query(ForumPost).filter(ForumPost.is_deleted == False).count()
-    total_comments = db.query(ForumComment).filter(ForumComment.is_deleted == False).count()
-    total_users = db.query(User).count()
+    try:
+        cached = await redis_client.get(STATS_CACHE_KEY)
+    except redis.RedisError:
+        logger.warning("Stats cache read failed", exc_info=True)
+        cached = None
+    if cached is not None:
+        return Response(content=cached, media_type="application/json")
+    
+    total_posts = await db.scalar(select(func.count(ForumPost.id)).where(ForumPost.is_deleted == False))
+    total_comments = await db.scalar(select(func.count(ForumComment.id)).where(ForumComment.is_deleted == False))
+    total_users = await db.scalar(select(func.count(User.id)))
     
     # Get recent posts
-    recent_posts = db.query(ForumPost).filter(
+    recent_posts = (await db.scalars(select(ForumPost).where(
         ForumPost.is_deleted == False
     ).options(
         joinedload(ForumPost.author),
         joinedload(ForumPost.category)
-    ).order_by(desc(ForumPost.created_at)).limit(5).all()
+    ).order_by(desc(ForumPost.created_at)).limit(5))).all()
     
     recent_posts_data = []
     for post in recent_posts:
-        recent_posts_data.append(ForumPost(
+        recent_posts_data.append(ForumPostSchema(
             **post.__dict__,
-            author_username=post.author.username,
+            author_username=post.author.name,
             category_name=post.category.name,
-            like_count=post.like_count,
-            comment_count=post.comment_count,
             latest_comments=[]
         ))
     
-    return ForumStats(
+    stats = ForumStats(
         total_posts=total_posts,
         total_comments=total_comments,
         total_users=total_users,
         recent_posts=recent_posts_data
     )
+    body = orjson.dumps(stats.model_dump())
+    try:
+        await redis_client.set(STATS_CACHE_KEY, body, ex=STATS_CACHE_TTL)
+    except redis.RedisError:
+        logger.warning("Stats cache write failed", exc_info=True)
+    return Response(content=body, media_type="application/json")
@@ -1,4 +1,5 @@
-from fastapi import APIRouter
+import orjson
+from fastapi import APIRouter, Response
 from typing import List, Optional
 from pydantic import BaseModel
 
@@ -9,20 +10,26 @@ class Quote(BaseModel):
     price: float
     change_pct: float
 
+# stubbed data – replace with real data source
+_QUOTES = (
+    Quote(pair="EUR/USD", price=1.0892, change_pct=0.05),
+    Quote(pair="GBP/USD", price=1.2754, change_pct=-0.12),
+    Quote(pair="USD/JPY", price=138.92, change_pct=0.23),
+    Quote(pair="AUD/USD", price=0.6598, change_pct=0.08),
+    Quote(pair="USD/CAD", price=1.3465, change_pct=-0.03),
+)
+# The list never changes, so serialise it once; filtered requests join the
+# pre-serialised entries for the requested pairs (keyed like "EURUSD")
+_QUOTES_JSON = orjson.dumps([q.model_dump() for q in _QUOTES])
+_QUOTE_JSON_BY_KEY = {q.pair.replace("/", ""): orjson.dumps(q.model_dump()) for q in _QUOTES}
+
 @router.get("/quotes", response_model=List[Quote])
 async def get_quotes(pairs: Optional[str] = None):
-    # stubbed data – replace with real data source
-    dummy = [
-        Quote(pair="EUR/USD", price=1.0892, change_pct=0.05),
-        Quote(pair="GBP/USD", price=1.2754, change_pct=-0.12),
-        Quote(pair="USD/JPY", price=138.92, change_pct=0.23),
-        Quote(pair="AUD/USD", price=0.6598, change_pct=0.08),
-        Quote(pair="USD/CAD", price=1.3465, change_pct=-0.03),
-    ]
     if pairs:
         wanted = {p.upper() for p in pairs.split(",")}
-        return [q for q in dummy if q.pair.replace("/", "") in wanted]
-    return dummy
+        body = b"[" + b",".join(blob for key, blob in _QUOTE_JSON_BY_KEY.items() if key in wanted) + b"]"
+        return Response(content=body, media_type="application/json")
+    return Response(content=_QUOTES_JSON, media_type="application/json")
 
 class MarketEvent(BaseModel):
     symbol: str
@@ -37,20 +44,24 @@ class MarketEventsResponse(BaseModel):
     historic: List[MarketEvent]
     upcoming: List[UpcomingEvent]
 
+# stubbed; wire this into your econ‐calendar service
+_EVENTS = MarketEventsResponse(
+    historic=[
+        MarketEvent(symbol="USD CPI Data", impact="High", time="14:30"),
+        MarketEvent(symbol="USD FOMC Statement", impact="Extreme", time="16:00"),
+        MarketEvent(symbol="GBP Employment Change", impact="High", time="08:00"),
+    ],
+    upcoming=[
+        UpcomingEvent(symbol="USD CPI Data", in_minutes=30),
+        UpcomingEvent(symbol="EUR ECB Speech", in_minutes=45),
+    ],
+)
+_EVENTS_JSON = orjson.dumps(_EVENTS.model_dump())
+
 @router.get("/events", response_model=MarketEventsResponse)
 async def get_events(
     impact: Optional[str] = "all",  # high, extreme or all
     upcoming_window: Optional[int] = 120,
 ):
-    # stubbed; wire this into your econ‐calendar service
-    return MarketEventsResponse(
-        historic=[
-            MarketEvent(symbol="USD CPI Data", impact="High", time="14:30"),
-            MarketEvent(symbol="USD FOMC Statement", impact="Extreme", time="16:00"),
-            MarketEvent(symbol="GBP Employment Change", impact="High", time="08:00"),
-        ],
-        upcoming=[
-            UpcomingEvent(symbol="USD CPI Data", in_minutes=30),
-            UpcomingEvent(symbol="EUR ECB Speech", in_minutes=45),
-        ],
-    )
+    # Same bytes on every hit until a real data source replaces the stub
+    return Response(content=_EVENTS_JSON, media_type="application/json")
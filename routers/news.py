@@ -40,6 +40,11 @@ class TradingNewsResponse(BaseModel):
     market_events: List[MarketEvent]
     top_news: List[NewsArticle] = []
 
+SENTIMENTS = ['positive', 'neutral', 'negative']
+EVENT_IMPACTS = ['high', 'medium', 'low']
+INSIGHT_IMPACTS = ['positive', 'neutral', 'high']
+RISK_IMPACTS = ['high', 'medium']
+
 @router.get("/", response_model=TradingNewsResponse)
 async def get_trading_news():
     try:
@@ -49,42 +54,52 @@ async def get_trading_news():
         if not market_news:
             raise HTTPException(status_code=500, detail="Failed to fetch market news")
         
-        # Process top 3 news articles
-        top_news = []
-        for article in market_news[:3]:
-            top_news.append(NewsArticle(
+        # Top 3 articles; the first 2 double as market events, so each
+        # timestamp is converted once and the random labels drawn up front
+        top_articles = market_news[:3]
+        published = [datetime.fromtimestamp(article.get('datetime', 0)) for article in top_articles]
+        sentiments = random.choices(SENTIMENTS, k=len(top_articles))
+        event_impacts = random.choices(EVENT_IMPACTS, k=2)
+        insight_impact, = random.choices(INSIGHT_IMPACTS)
+        risk_impact, = random.choices(RISK_IMPACTS)
+        
+        top_news = [
+            NewsArticle(
                 headline=article.get('headline', 'No headline'),
                 summary=article.get('summary', 'No summary available'),
                 url=article.get('url', '#'),
-                time=datetime.fromtimestamp(article.get('datetime', 0)).strftime('%Y-%m-%d %H:%M:%S'),
+                time=when.strftime('%Y-%m-%d %H:%M:%S'),
                 source=article.get('source', 'Unknown'),
-                sentiment=random.choice(['positive', 'neutral', 'negative'])
-            ))
+                sentiment=sentiment
+            )
+            for article, when, sentiment in zip(top_articles, published, sentiments)
+        ]
         
         # Create a daily insight based on the latest news
         latest_news = market_news[0]
         daily_insight = Insight(
             message=f"{latest_news.get('headline', 'Market update available')}",
-            impact=random.choice(['positive', 'neutral', 'high']),
+            impact=insight_impact,
             source=latest_news.get('source', 'Market Data')
         )
         
         # Create a risk reminder (this is a simplified example)
         risk_reminder = RiskReminder(
             message="Market shows increased volatility",
-            impact=random.choice(['high', 'medium']),
+            impact=risk_impact,
             symbol="SPY"  # Example symbol
         )
         
-        # Create market events from news
-        market_events = []
-        for event in market_news[:2]:  # Get top 2 events
-            market_events.append(MarketEvent(
+        # Create market events from news (top 2)
+        market_events = [
+            MarketEvent(
                 event=event.get('headline', 'Market Event'),
-                time=datetime.fromtimestamp(event.get('datetime', 0)).strftime('%Y-%m-%d %H:%M'),
-                impact=random.choice(['high', 'medium', 'low']),
+                time=when.strftime('%Y-%m-%d %H:%M'),
+                impact=impact,
                 url=event.get('url', '#')
-            ))
+            )
+            for event, when, impact in zip(top_articles[:2], published, event_impacts)
+        ]
         
         return {
             "daily_insight": daily_insight,
@@ -93,11 +108,7 @@ async def get_trading_news():
             "top_news": top_news
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching market data: {str(e)}")
-    
-    finally:
-        # Ensure the client is properly closed
-        if 'finnhub_client' in locals():
-            await finnhub_client.close()
-    return 
\ No newline at end of file
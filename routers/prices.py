@@ -1,16 +1,28 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Response
 import httpx
 import os
-import json
+import orjson
+import time
 from dotenv import load_dotenv
 from typing import List, Dict, Any
 
+from utils.http_client import client
+
 load_dotenv()
 
 router = APIRouter()
 SYMBOLS = "EUR/USD,GBP/USD,USD/JPY,AUD/USD,USD/CAD"
 API_KEY = os.getenv("TWELVE_API_KEY")
 TIMEOUT = 10.0  # seconds
+PRICE_CACHE_TTL = 2.0  # seconds; bursts are served from memory, not Twelve Data
+
+# Placeholder "change" values: Twelve Data's /price has no change field, so
+# this is synthetic. Computed once per process rather than per symbol per call;
+# replace with a delta against the previous tick when real data is wired in.
+_CHANGE_CACHE = {s: round(((hash(s) % 20) - 10) / 100, 2) for s in SYMBOLS.split(",")}
+
+# (expires_at, serialised prices) for the last successful upstream fetch
+_price_cache = (0.0, None)
 
 # Mock data for when API is not available
 MOCK_DATA = [
@@ -20,6 +32,10 @@ MOCK_DATA = [
     {"pair": "AUD/USD", "price": 0.6532, "change": -0.12},
     {"pair": "USD/CAD", "price": 1.3542, "change": 0.08},
 ]
+MOCK_RESPONSE_BODY = orjson.dumps(MOCK_DATA)
+
+def _json_response(body: bytes) -> Response:
+    return Response(content=body, media_type="application/json")
 
 @router.get("/prices", response_model=List[Dict[str, Any]])
 async def get_prices(use_mock: bool = False):
@@ -27,16 +43,21 @@ async def get_prices(use_mock: bool = False):
     Get current forex prices.
     Set use_mock=true to get test data instead of calling the external API.
     """
+    global _price_cache
     if use_mock or not API_KEY:
-        return MOCK_DATA
+        return _json_response(MOCK_RESPONSE_BODY)
+    
+    expires_at, cached = _price_cache
+    if cached is not None and time.monotonic() < expires_at:
+        return _json_response(cached)
     
     try:
         url = f"https://api.twelvedata.com/price?symbol={SYMBOLS}&apikey={API_KEY}"
         
-        async with httpx.AsyncClient(timeout=TIMEOUT) as client:
-            response = await client.get(url)
-            response.raise_for_status()
-            data = response.json()
+        # Shared keep-alive client instead of a new connection + TLS handshake per call
+        response = await client.get(url, timeout=TIMEOUT)
+        response.raise_for_status()
+        data = orjson.loads(response.content)
 
         result = []
         for symbol, info in data.items():
@@ -45,7 +66,7 @@ async def get_prices(use_mock: bool = False):
                     result.append({
                         "pair": symbol,
                         "price": float(info["price"]),
-                        "change": round(((hash(symbol) % 20) - 10) / 100, 2)
+                        "change": _CHANGE_CACHE.get(symbol, 0.0)
                     })
                 except (ValueError, TypeError):
                     continue
@@ -53,9 +74,11 @@ async def get_prices(use_mock: bool = False):
         # If we didn't get any valid prices, return mock data
         if not result:
             print("No valid prices received from API, falling back to mock data")
-            return MOCK_DATA
-            
-        return result
+            return _json_response(MOCK_RESPONSE_BODY)
+        
+        body = orjson.dumps(result)
+        _price_cache = (time.monotonic() + PRICE_CACHE_TTL, body)
+        return _json_response(body)
         
     except httpx.HTTPStatusError as e:
         print(f"HTTP error from Twelve Data API: {e}")
@@ -65,4 +88,4 @@ async def get_prices(use_mock: bool = False):
         print(f"Unexpected error: {e}")
     
     # Fall back to mock data if anything goes wrong
-    return MOCK_DATA
+    return _json_response(MOCK_RESPONSE_BODY)
@@ -2,10 +2,13 @@ from pydantic import BaseModel, Field, validator
 from typing import Optional, List
 from datetime import datetime
 
+# Checked by pydantic-core's compiled regex, built once per schema
+HEX_COLOR_PATTERN = r"^#[0-9A-Fa-f]{6}$"
+
 class ForumCategoryBase(BaseModel):
     name: str = Field(..., min_length=1, max_length=100)
     description: Optional[str] = None
-    color: str = Field(default="#3498db", pattern=r"^#[0-9A-Fa-f]{6}$")
+    color: str = Field(default="#3498db", pattern=HEX_COLOR_PATTERN)
 
 class ForumCategoryCreate(ForumCategoryBase):
     pass
@@ -13,7 +16,7 @@ class ForumCategoryCreate(ForumCategoryBase):
 class ForumCategoryUpdate(BaseModel):
     name: Optional[str] = Field(None, min_length=1, max_length=100)
     description: Optional[str] = None
-    color: Optional[str] = Field(None, pattern=r"^#[0-9A-Fa-f]{6}$")
+    color: Optional[str] = Field(None, pattern=HEX_COLOR_PATTERN)
     is_active: Optional[bool] = None
 
 class ForumCategory(ForumCategoryBase):
@@ -82,11 +85,12 @@ class ForumPost(ForumPostBase):
 
 class ForumPostList(BaseModel):
     posts: List[ForumPost]
-    total: int
+    total: Optional[int] = None
     page: int
     per_page: int
     has_next: bool
     has_prev: bool
+    next_cursor: Optional[str] = None
 
 class ForumStats(BaseModel):
     total_posts: int
@@ -94,5 +98,9 @@ class ForumStats(BaseModel):
     total_users: int
     recent_posts: List[ForumPost]
 
-# Update ForumComment to handle self-referencing
+# Resolve the self-reference now, and rebuild the models that embed
+# ForumComment so none of them is completed lazily on a first request
 ForumComment.model_rebuild()
+ForumPost.model_rebuild()
+ForumPostList.model_rebuild()
+ForumStats.model_rebuild()
@@ -3,49 +3,66 @@ from datetime import datetime
 from pydantic import BaseModel, Field
 import os
 import asyncio
+import logging
+import orjson
 import httpx
 from fastapi import Depends, APIRouter
 
-# … your existing imports, PriceAlert, alerts list, etc. …
+from utils.http_client import client
+from utils.redis_client import redis_client
+
+logger = logging.getLogger(__name__)
 
 # Configuration for alerts
 ALERTS_API_URL = os.getenv("ALERTS_API_URL")
 SYNC_INTERVAL = int(os.getenv("ALERT_SYNC_INTERVAL", 300))  # Default to 5 minutes
 ALERTS_ENABLED = os.getenv("ALERTS_ENABLED", "false").lower() == "true"
 
+# Synced alerts live in Redis so every worker reads the same list. Each
+# interval only the worker that takes the sync lock calls the remote API.
+ALERTS_KEY = "alerts:current"
+# The shared list ages out if every worker stops syncing, rather than being
+# served as current forever
+ALERTS_TTL = SYNC_INTERVAL * 3
+ALERTS_SYNC_LOCK_KEY = "alerts:sync:lock"
+
 async def sync_alerts_from_remote():
     """
     Fetch the latest alerts from ALERTS_API_URL
-    and overwrite our in-memory `alerts` list.
+    and overwrite the shared list in Redis.
     """
     if not ALERTS_ENABLED or not ALERTS_API_URL:
-        print("[alerts] Alert syncing is disabled. Set ALERTS_ENABLED=true and ALERTS_API_URL to enable.")
+        logger.info("Alert syncing is disabled. Set ALERTS_ENABLED=true and ALERTS_API_URL to enable.")
         return
 
     try:
-        print(f"[alerts] Fetching alerts from {ALERTS_API_URL}")
-        async with httpx.AsyncClient(timeout=10) as client:
-            resp = await client.get(ALERTS_API_URL)
-            resp.raise_for_status()
-            data = resp.json()  # expecting List[ {id,pair,target,direction} ]
+        logger.debug("Fetching alerts from %s", ALERTS_API_URL)
+        resp = await client.get(ALERTS_API_URL)
+        resp.raise_for_status()
+        data = orjson.loads(resp.content)  # expecting List[ {id,pair,target,direction} ]
 
-        # Replace the in-memory list in-place to keep references valid.
-        alerts = []
+        fresh = []
+        invalid = 0
         for item in data:
             try:
                 # validate via Pydantic
-                alerts.append(PriceAlert(**item))
-            except Exception as e:
-                print(f"[alerts] Invalid alert format: {e}")
+                fresh.append(PriceAlert(**item))
+            except Exception:
+                invalid += 1
+        if invalid:
+            logger.warning("Skipped %d alerts with an invalid format", invalid)
 
-        print(f"[alerts] Successfully synced {len(alerts)} alerts")
-        return alerts
+        await redis_client.set(
+            ALERTS_KEY, orjson.dumps([alert.model_dump() for alert in fresh]), ex=ALERTS_TTL
+        )
+        logger.info("Synced %d alerts", len(fresh))
+        return fresh
     except httpx.HTTPStatusError as e:
-        print(f"[alerts] HTTP error while fetching alerts: {e}")
+        logger.warning("HTTP error while fetching alerts: %s", e)
     except httpx.RequestError as e:
-        print(f"[alerts] Failed to connect to alerts API: {e}")
-    except Exception as e:
-        print(f"[alerts] Unexpected error: {e}")
+        logger.warning("Failed to connect to alerts API: %s", e)
+    except Exception:
+        logger.exception("Unexpected error while syncing alerts")
     return []
 
 async def _periodic_alert_sync():
@@ -53,16 +70,19 @@ async def _periodic_alert_sync():
     await asyncio.sleep(5)
     
     if not ALERTS_ENABLED or not ALERTS_API_URL:
-        print("[alerts] Alert syncing is disabled. Set ALERTS_ENABLED=true and ALERTS_API_URL to enable.")
+        logger.info("Alert syncing is disabled. Set ALERTS_ENABLED=true and ALERTS_API_URL to enable.")
         return
         
-    print(f"[alerts] Starting alert sync service. Interval: {SYNC_INTERVAL}s")
+    logger.info("Starting alert sync service. Interval: %ds", SYNC_INTERVAL)
     
     while True:
         try:
-            await sync_alerts_from_remote()
-        except Exception as e:
-            print(f"[alerts] Error in sync task: {e}")
+            # The lock expires by itself, so a new worker takes over next
+            # interval if the current one goes away
+            if await redis_client.set(ALERTS_SYNC_LOCK_KEY, os.getpid(), nx=True, ex=SYNC_INTERVAL):
+                await sync_alerts_from_remote()
+        except Exception:
+            logger.exception("Error in alert sync task")
         await asyncio.sleep(SYNC_INTERVAL)
 
 # This function will be called from app.py on startup
@@ -71,12 +91,12 @@ async def start_alert_sync_task():
     Schedule the periodic sync loop when the router is mounted.
     """
     if not ALERTS_ENABLED or not ALERTS_API_URL:
-        print("[alerts] Alert syncing is disabled. Set ALERTS_ENABLED=true and ALERTS_API_URL to enable.")
+        logger.info("Alert syncing is disabled. Set ALERTS_ENABLED=true and ALERTS_API_URL to enable.")
         return
         
     # This will run in the background for the lifetime of the app
     asyncio.create_task(_periodic_alert_sync())
-    print("[alerts] Alert sync service started")
+    logger.info("Alert sync service started")
 
 class PriceAlert(BaseModel):
     id: str
@@ -84,6 +104,13 @@ class PriceAlert(BaseModel):
     target: float
     direction: str
 
+async def get_alerts() -> List[PriceAlert]:
+    """Return the most recently synced alerts (empty until the first sync)."""
+    raw = await redis_client.get(ALERTS_KEY)
+    if raw is None:
+        return []
+    return [PriceAlert(**item) for item in orjson.loads(raw)]
+
 class SwingAnalysisHistoryItem(BaseModel):
     id: int
     created_at: datetime
@@ -91,3 +118,9 @@ class SwingAnalysisHistoryItem(BaseModel):
 
     class Config:
         orm_mode = True
+
+class SwingAnalysisHistoryPage(BaseModel):
+    items: List[SwingAnalysisHistoryItem]
+    # Pass these back as before / before_id to get the next page
+    next_before: Optional[datetime] = None
+    next_before_id: Optional[int] = None
@@ -0,0 +1,16 @@
+# scripts/init_db.py
+#
+# Create all tables once at deploy time:
+#   python -m scripts.init_db
+
+import models  # noqa: F401  (registers the models on Base.metadata)
+from utils.db import Base, engine
+
+
+def init_db():
+    Base.metadata.create_all(bind=engine)
+
+
+if __name__ == "__main__":
+    init_db()
+    print("Database tables created.")
@@ -0,0 +1,131 @@
+# scripts/migrate.py
+#
+# Bring an existing database up to the current models. create_all only
+# creates missing tables, so columns, type changes and indexes added to
+# existing tables are applied here. Every step is idempotent; run it after
+# init_db on each deploy:
+#   python -m scripts.migrate
+#
+# Index builds use CONCURRENTLY so live tables stay writable. Run this against
+# Postgres directly rather than through PgBouncer: the index step needs a
+# session outside any transaction.
+
+from sqlalchemy import text
+
+from utils.db import engine
+
+# (table, column, DDL type, backfill run only when the column is added)
+COUNTER_COLUMNS = [
+    (
+        "forum_posts", "like_count", "integer NOT NULL DEFAULT 0",
+        "UPDATE forum_posts p SET like_count ="
+        " (SELECT count(*) FROM post_likes l WHERE l.post_id = p.id)",
+    ),
+    (
+        "forum_posts", "comment_count", "integer NOT NULL DEFAULT 0",
+        "UPDATE forum_posts p SET comment_count ="
+        " (SELECT count(*) FROM forum_comments c"
+        "  WHERE c.post_id = p.id AND c.is_deleted IS NOT TRUE)",
+    ),
+    (
+        "forum_comments", "like_count", "integer NOT NULL DEFAULT 0",
+        "UPDATE forum_comments c SET like_count ="
+        " (SELECT count(*) FROM comment_likes l WHERE l.comment_id = c.id)",
+    ),
+    (
+        "forum_posts", "search_tsv",
+        "tsvector GENERATED ALWAYS AS (to_tsvector('english',"
+        " coalesce(title, '') || ' ' || coalesce(content, ''))) STORED",
+        None,
+    ),
+]
+
+# (name, definition); replaced indexes are dropped by name below
+INDEXES = [
+    ("ix_forum_posts_live_cat_pinned_created",
+     "ON forum_posts (category_id, is_pinned, created_at) WHERE is_deleted = false"),
+    ("ix_forum_posts_live_author",
+     "ON forum_posts (author_id) WHERE is_deleted = false"),
+    ("ix_forum_posts_live_pinned_created_id",
+     "ON forum_posts (is_pinned, created_at, id) WHERE is_deleted = false"),
+    ("ix_forum_posts_search_tsv",
+     "ON forum_posts USING gin (search_tsv)"),
+    ("ix_forum_posts_title_trgm",
+     "ON forum_posts USING gin (title gin_trgm_ops)"),
+    ("ix_forum_posts_content_trgm",
+     "ON forum_posts USING gin (content gin_trgm_ops)"),
+    ("ix_forum_comments_live_post_created",
+     "ON forum_comments (post_id, created_at) WHERE is_deleted = false"),
+    ("ix_forum_comments_live_parent",
+     "ON forum_comments (parent_id) WHERE is_deleted = false"),
+    ("ix_swing_created_id",
+     "ON swing_analysis_history (created_at, id)"),
+]
+
+UNIQUE_INDEXES = [
+    ("ix_post_likes_post_user", "ON post_likes (post_id, user_id)"),
+    ("ix_comment_likes_comment_user", "ON comment_likes (comment_id, user_id)"),
+]
+
+DROPPED_INDEXES = [
+    "ix_forum_posts_cat_pinned_created",
+    "ix_forum_posts_author",
+    "ix_forum_comments_post_deleted_created",
+    "ix_forum_comments_parent",
+    "ix_swing_analysis_history_created_at",
+]
+
+
+def _column_type(conn, table: str, column: str):
+    return conn.execute(
+        text(
+            "SELECT data_type FROM information_schema.columns"
+            " WHERE table_schema = current_schema()"
+            " AND table_name = :table AND column_name = :column"
+        ),
+        {"table": table, "column": column},
+    ).scalar()
+
+
+def migrate():
+    with engine.begin() as conn:
+        # Backfills outlast the app's statement timeout
+        conn.execute(text("SET LOCAL statement_timeout = 0"))
+        conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+
+        # Columns are added and backfilled in one transaction so readers
+        # never see zeroed counters
+        for table, column, ddl, backfill in COUNTER_COLUMNS:
+            if _column_type(conn, table, column) is not None:
+                continue
+            conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+            if backfill:
+                conn.execute(text(backfill))
+
+        if _column_type(conn, "users", "otp_expiry") == "timestamp without time zone":
+            conn.execute(text(
+                "ALTER TABLE users ALTER COLUMN otp_expiry TYPE timestamptz"
+                " USING otp_expiry AT TIME ZONE 'UTC'"
+            ))
+
+        if _column_type(conn, "swing_analysis_history", "analysis") == "text":
+            conn.execute(text(
+                "ALTER TABLE swing_analysis_history"
+                " ALTER COLUMN analysis TYPE jsonb USING analysis::jsonb"
+            ))
+
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction. A build that
+    # fails leaves an INVALID index behind; drop it by hand before re-running.
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text("SET statement_timeout = 0"))
+        for name, definition in INDEXES:
+            conn.execute(text(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} {definition}"))
+        for name, definition in UNIQUE_INDEXES:
+            conn.execute(text(f"CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS {name} {definition}"))
+        for name in DROPPED_INDEXES:
+            conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+
+
+if __name__ == "__main__":
+    migrate()
+    print("Database migrated.")
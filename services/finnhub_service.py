@@ -1,8 +1,10 @@
 import os
-import httpx
+import orjson
 from dotenv import load_dotenv
 from datetime import datetime, timedelta
 
+from utils.http_client import client
+
 # Load environment variables
 load_dotenv()
 
@@ -12,7 +14,8 @@ class FinnhubService:
         if not self.api_key:
             raise ValueError("FINNHUB_API_KEY not found in environment variables")
         self.base_url = "https://finnhub.io/api/v1"
-        self.client = httpx.AsyncClient()
+        # Shared keep-alive client; closed once at app shutdown
+        self.client = client
 
     async def get_market_news(self):
         """Fetch general market news"""
@@ -25,7 +28,7 @@ class FinnhubService:
                 }
             )
             response.raise_for_status()
-            return response.json()
+            return orjson.loads(response.content)
         except Exception as e:
             print(f"Error fetching market news: {str(e)}")
             return []
@@ -47,13 +50,10 @@ class FinnhubService:
                 }
             )
             response.raise_for_status()
-            return response.json()
+            return orjson.loads(response.content)
         except Exception as e:
             print(f"Error fetching company news: {str(e)}")
             return []
 
-    async def close(self):
-        await self.client.aclose()
-
 # Create a singleton instance
 finnhub_client = FinnhubService()
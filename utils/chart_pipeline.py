@@ -0,0 +1,114 @@
+import asyncio
+import hashlib
+import logging
+import os
+from datetime import datetime
+from typing import Optional
+
+import orjson
+import redis
+from fastapi import BackgroundTasks, HTTPException, UploadFile
+from sqlalchemy import select, tuple_
+from sqlalchemy.orm import Session
+
+from utils.db import SessionLocal
+from utils.image_check import is_trading_chart
+from utils.redis_client import redis_client
+from utils.gemini_helper import chart_batcher, get_gemini_file_uri, get_image_mime_type, read_upload
+
+logger = logging.getLogger(__name__)
+
+# Re-submitted charts (retries, re-polling dashboards) are answered from Redis,
+# keyed by image content and timeframe, instead of another Gemini call
+ANALYSIS_CACHE_TTL = int(os.getenv("ANALYSIS_CACHE_TTL", 3600))
+
+
+def _retrieve_exception(task: asyncio.Task) -> None:
+    # Mark a dropped task's failure as seen so asyncio doesn't log
+    # "Task exception was never retrieved" for it
+    if not task.cancelled():
+        task.exception()
+
+
+def _persist_history(model, result: dict) -> None:
+    with SessionLocal() as db:
+        db.add(model(analysis=result))
+        db.commit()
+
+
+async def run_chart_analysis(file: UploadFile, timeframe: str, background_tasks: BackgroundTasks, model) -> dict:
+    """Validate and analyse an uploaded chart, then record the result in `model`'s table."""
+    # 1) Read upload into memory
+    data = await read_upload(file)
+    mime = get_image_mime_type(file.filename, file.content_type)
+
+    # Only analyses of validated charts are stored, so a hit skips the check too.
+    # The cache is optional: if Redis is unavailable, analyse uncached.
+    cache_key = f"chart:analysis:{hashlib.sha256(data).hexdigest()}:{timeframe}"
+    try:
+        cached = await redis_client.get(cache_key)
+    except redis.RedisError:
+        logger.warning("Analysis cache read failed", exc_info=True)
+        cached = None
+    if cached is not None:
+        return orjson.loads(cached)
+
+    # 2) Validate it’s a chart while the image uploads to Gemini; the
+    #    upload is dropped if the check fails
+    upload = asyncio.create_task(get_gemini_file_uri(data, mime))
+    upload.add_done_callback(_retrieve_exception)
+    try:
+        is_chart = await asyncio.to_thread(is_trading_chart, data)
+    except BaseException:
+        upload.cancel()
+        raise
+    if not is_chart:
+        upload.cancel()
+        raise HTTPException(status_code=400, detail="Please upload a valid trading chart image.")
+
+    # 3) Analyze
+    result = await chart_batcher.submit(await upload, mime, timeframe)
+
+    # A rejection (e.g. timeframe mismatch) is returned as-is, but isn't an
+    # analysis: keep it out of history and don't pin it in the cache
+    if "error" in result:
+        return result
+
+    # 4) Persist into history after the response is sent; nothing in the
+    #    response depends on the stored row
+    background_tasks.add_task(_persist_history, model, result)
+
+    try:
+        await redis_client.set(cache_key, orjson.dumps(result), ex=ANALYSIS_CACHE_TTL)
+    except redis.RedisError:
+        logger.warning("Analysis cache write failed", exc_info=True)
+
+    return result
+
+
+def get_analysis_history(
+    db: Session,
+    model,
+    limit: int,
+    before: Optional[datetime] = None,
+    before_id: Optional[int] = None,
+) -> dict:
+    """
+    Return up to `limit` analyses, newest first, older than the
+    (`before`, `before_id`) cursor from the previous page if given.
+    """
+    # Plain column rows rather than ORM objects: the page is read-only and
+    # goes straight to the response model, so identity-map tracking is waste
+    stmt = select(model.id, model.created_at, model.analysis)
+    if before is not None:
+        if before_id is None:
+            raise HTTPException(400, detail="before_id is required with before")
+        stmt = stmt.where(tuple_(model.created_at, model.id) < (before, before_id))
+    stmt = stmt.order_by(model.created_at.desc(), model.id.desc()).limit(limit + 1)
+    rows = db.execute(stmt).all()
+
+    page = {"items": rows[:limit]}
+    if len(rows) > limit:
+        page["next_before"] = rows[limit - 1].created_at
+        page["next_before_id"] = rows[limit - 1].id
+    return page
@@ -1,7 +1,10 @@
 # utils/db.py
 
 import os
+import orjson
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from dotenv import load_dotenv
@@ -14,10 +17,51 @@ DATABASE_URL = os.getenv("DATABASE_URL")
 if not DATABASE_URL:
     raise RuntimeError("DATABASE_URL environment variable is not set")
 
-# Create the SQLAlchemy engine with pool pre-ping for resilience
+# Pool settings shared by the sync and async engines. Every worker process
+# holds its own pools, so keep them small: workers x (pool + overflow) across
+# both engines must stay under Postgres' max_connections. Recycle before idle
+# Postgres/proxy timeouts drop the socket, and LIFO keeps a small set of
+# connections hot instead of cycling through all of them.
+ENGINE_KWARGS = dict(
+    pool_recycle=int(os.getenv("DB_POOL_RECYCLE", 1800)),
+    pool_timeout=int(os.getenv("DB_POOL_TIMEOUT", 30)),
+    pool_pre_ping=True,
+    pool_use_lifo=True,
+    # JSON/JSONB columns go through orjson instead of the stdlib json module
+    json_serializer=lambda obj: orjson.dumps(obj).decode(),
+    json_deserializer=orjson.loads,
+)
+
+# Server-side cap on any single statement so a runaway query can't hold a
+# pooled connection indefinitely; 0 disables it
+STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", 10000))
+
+# Create the SQLAlchemy engine. Most traffic goes through the async engine;
+# the sync one only serves the remaining sync routes and background writes.
 engine = create_engine(
     DATABASE_URL,
-    pool_pre_ping=True,
+    connect_args={"options": f"-c statement_timeout={STATEMENT_TIMEOUT_MS}"},
+    pool_size=int(os.getenv("DB_SYNC_POOL_SIZE", 2)),
+    max_overflow=int(os.getenv("DB_SYNC_MAX_OVERFLOW", 3)),
+    **ENGINE_KWARGS,
+)
+
+# Async engine over asyncpg for routes that must not block the event loop
+ASYNC_DATABASE_URL = make_url(DATABASE_URL).set(drivername="postgresql+asyncpg")
+
+# Behind PgBouncer in transaction mode a connection may land on a different
+# backend per transaction, so asyncpg's prepared-statement caches must be off.
+ASYNC_CONNECT_ARGS = {"server_settings": {"statement_timeout": str(STATEMENT_TIMEOUT_MS)}}
+if os.getenv("DB_PGBOUNCER") == "1":
+    ASYNC_DATABASE_URL = ASYNC_DATABASE_URL.update_query_dict({"prepared_statement_cache_size": "0"})
+    ASYNC_CONNECT_ARGS["statement_cache_size"] = 0
+
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    connect_args=ASYNC_CONNECT_ARGS,
+    pool_size=int(os.getenv("DB_POOL_SIZE", 5)),
+    max_overflow=int(os.getenv("DB_MAX_OVERFLOW", 10)),
+    **ENGINE_KWARGS,
 )
 
 # Configure session class
@@ -27,6 +71,12 @@ SessionLocal = sessionmaker(
     bind=engine,
 )
 
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
 # Base class for model definitions
 Base = declarative_base()
 
@@ -37,3 +87,9 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+# Async dependency for FastAPI routes
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -1,75 +1,336 @@
 import os
-import json
-import base64
+import time
+import random
+import asyncio
+import uuid
+import hashlib
+import itertools
 import mimetypes
-import requests
-from fastapi import HTTPException
+from collections import OrderedDict
+import orjson
+from typing import List
+from fastapi import HTTPException, UploadFile
+from pydantic import BaseModel, ValidationError
 from dotenv import load_dotenv
 
+from utils.http_client import client
+
 load_dotenv()
 GEMINI_KEY = os.getenv("GEMINI_API_KEY")
 if not GEMINI_KEY:
     raise RuntimeError("GEMINI_API_KEY not set in .env")
 
-def get_image_mime_type(path: str) -> str:
-    mime, _ = mimetypes.guess_type(path)
-    return mime or "image/png"
+GEMINI_UPLOAD_URL = "https://generativelanguage.googleapis.com/upload/v1beta/files"
+GEMINI_GENERATE_URL = (
+    "https://generativelanguage.googleapis.com/v1beta/models/"
+    "gemini-2.5-flash:generateContent?key=" + GEMINI_KEY
+)
+GENERATION_CONFIG = {"response_mime_type": "application/json"}
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+# Throttle before Gemini does: at most GEMINI_MAX_CONC calls in flight and
+# GEMINI_RPM call starts per minute across this worker. 429s and 5xx are
+# retried with exponential backoff.
+GEMINI_MAX_CONC = int(os.getenv("GEMINI_MAX_CONC", 8))
+GEMINI_RPM = int(os.getenv("GEMINI_RPM", 60))
+GEMINI_MAX_RETRIES = 3
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+_gemini_sem = asyncio.Semaphore(GEMINI_MAX_CONC)
+_min_gap = 60 / GEMINI_RPM
+_next_slot = 0.0
+
+# Chart uploads are read in chunks and rejected once they pass this size
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", 10 * 1024 * 1024))
+UPLOAD_CHUNK_SIZE = 1 << 20
+
+# Uploads are only kept in memory; set UPLOAD_DIR to also save a copy for debugging
+UPLOAD_DIR = os.getenv("UPLOAD_DIR")
 
-def analyze_image_with_gemini(path: str, timeframe: str) -> dict:
-    mime = get_image_mime_type(path)
-    with open(path, "rb") as f:
-        data_b64 = base64.b64encode(f.read()).decode()
-
-    prompt = (
-            # 1) Check the screenshot’s timeframe vs. the provided one
-            f"You are an expert trading chart analyst using ICT concepts. "
-            f"First, verify that the timeframe displayed on the chart screenshot matches the selected timeframe ({timeframe}). "
-            "If it does NOT match, respond ONLY with this JSON:\n"
-            '{ "error":"Provided timeframe does not match chart timeframe." }\n'
-            "Otherwise, based on the selected timeframe, respond ONLY with this JSON schema:\n"
-            '{'
-              '"signal":"BUY or SELL", '
-              '"confidence":"int %", '
-              '"entry":"price", '
-              '"stop_loss":"price", '
-              '"take_profit":"price", '
-              '"risk_reward_ratio":"R:R", '
-              f'"timeframe":"{timeframe}", '
-              '"technical_analysis":{'
-                '"RSI":"num",'
-                '"MACD":"Bullish/Bearish",'
-                '"Moving_Average":"status",'
-                '"ICT_Order_Block":"Detected/Not Detected",'
-                '"ICT_Fair_Value_Gap":"Detected/Not Detected",'
-                '"ICT_Breaker_Block":"Detected/Not Detected",'
-                '"ICT_Trendline":"Upward/Downward/Neutral"'
-              '}, '
-              '"recommendation":"text", '
-              '"dynamic_stop_loss":"calculated based on selected timeframe", '
-              '"dynamic_take_profit":"calculated based on selected timeframe" '
-            '}'
-        ) 
-
-    payload = {
-          "contents": [
-            {
-              "parts": [
-                {"text": prompt},
-                {"inline_data":{"mime_type":mime,"data":data_b64}}
-              ]
-            }
-          ],
-          "generationConfig": {"response_mime_type": "application/json"}
+# Gemini keeps uploaded files for 48h; reuse a URI for identical bytes well
+# inside that window. Keyed by (sha256, mime), most recently used last.
+UPLOAD_CACHE_TTL = 6 * 60 * 60
+UPLOAD_CACHE_SIZE = 256
+_upload_cache: "OrderedDict[tuple, tuple]" = OrderedDict()
+
+# Upload display names only need to be unique within this process
+_upload_counter = itertools.count()
+_pid = os.getpid()
+
+# The prompt is constant except for the selected timeframe, which is
+# spliced in between these pieces.
+PROMPT_PREFIX = (
+    # 1) Check the screenshot’s timeframe vs. the provided one
+    "You are an expert trading chart analyst using ICT concepts. "
+    "First, verify that the timeframe displayed on the chart screenshot matches the selected timeframe ("
+)
+PROMPT_MIDDLE = (
+    "). "
+    "If it does NOT match, respond ONLY with this JSON:\n"
+    '{ "error":"Provided timeframe does not match chart timeframe." }\n'
+    "Otherwise, based on the selected timeframe, respond ONLY with this JSON schema:\n"
+    '{'
+      '"signal":"BUY or SELL", '
+      '"confidence":"int %", '
+      '"entry":"price", '
+      '"stop_loss":"price", '
+      '"take_profit":"price", '
+      '"risk_reward_ratio":"R:R", '
+      '"timeframe":"'
+)
+PROMPT_SUFFIX = (
+      '", '
+      '"technical_analysis":{'
+        '"RSI":"num",'
+        '"MACD":"Bullish/Bearish",'
+        '"Moving_Average":"status",'
+        '"ICT_Order_Block":"Detected/Not Detected",'
+        '"ICT_Fair_Value_Gap":"Detected/Not Detected",'
+        '"ICT_Breaker_Block":"Detected/Not Detected",'
+        '"ICT_Trendline":"Upward/Downward/Neutral"'
+      '}, '
+      '"recommendation":"text", '
+      '"dynamic_stop_loss":"calculated based on selected timeframe", '
+      '"dynamic_take_profit":"calculated based on selected timeframe" '
+    '}'
+)
+
+# The generateContent body serialised once, with placeholders for the three
+# per-request values. Substitutes are JSON-encoded, so they're escaped safely.
+_GENERATE_BODY_TEMPLATE = orjson.dumps({
+    "contents": [
+        {
+            "parts": [
+                {"text": f"{PROMPT_PREFIX}__TIMEFRAME__{PROMPT_MIDDLE}__TIMEFRAME__{PROMPT_SUFFIX}"},
+                {"file_data": {"mime_type": "__MIME__", "file_uri": "__FILE_URI__"}},
+            ]
         }
+    ],
+    "generationConfig": GENERATION_CONFIG,
+})
+
+def _build_generate_body(file_uri: str, mime: str, timeframe: str) -> bytes:
+    return (
+        _GENERATE_BODY_TEMPLATE
+        .replace(b"__TIMEFRAME__", orjson.dumps(timeframe)[1:-1])
+        .replace(b'"__MIME__"', orjson.dumps(mime))
+        .replace(b'"__FILE_URI__"', orjson.dumps(file_uri))
+    )
+
+class GeminiPart(BaseModel):
+    text: str
+
+class GeminiContent(BaseModel):
+    parts: List[GeminiPart]
+
+class GeminiCandidate(BaseModel):
+    content: GeminiContent
+
+class GeminiResponse(BaseModel):
+    candidates: List[GeminiCandidate]
+
+def get_image_mime_type(filename: str, content_type: str = None) -> str:
+    if content_type and content_type.startswith("image/"):
+        return content_type
+    mime, _ = mimetypes.guess_type(filename or "")
+    return mime or "image/png"
+
+async def read_upload(file: UploadFile) -> bytes:
+    """Read an uploaded image in chunks, refusing anything over MAX_UPLOAD_BYTES."""
+    data = bytearray()
+    while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+        data += chunk
+        if len(data) > MAX_UPLOAD_BYTES:
+            raise HTTPException(413, detail="Chart image is too large.")
+    data = bytes(data)
+    if UPLOAD_DIR:
+        await asyncio.to_thread(_save_debug_copy, data, file.filename)
+    return data
+
+def _save_debug_copy(data: bytes, filename: str) -> None:
+    os.makedirs(UPLOAD_DIR, exist_ok=True)
+    suffix = os.path.splitext(filename or "")[1]
+    with open(os.path.join(UPLOAD_DIR, uuid.uuid4().hex + suffix), "wb") as out:
+        out.write(data)
+
+def _reserve_slot() -> float:
+    """Claim the next free start time and return how long to wait for it."""
+    global _next_slot
+    now = time.monotonic()
+    slot = max(now, _next_slot)
+    _next_slot = slot + _min_gap
+    return slot - now
 
-    url = (
-          "https://generativelanguage.googleapis.com/v1beta/models/"
-          "gemini-2.5-flash:generateContent?key=" + GEMINI_KEY
-        )
-    resp = requests.post(url, json=payload, timeout=60)
+async def _post_to_gemini(url: str, **kwargs):
+    for attempt in range(GEMINI_MAX_RETRIES + 1):
+        async with _gemini_sem:
+            delay = _reserve_slot()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            resp = await client.post(url, **kwargs)
+        if resp.status_code not in RETRY_STATUSES or attempt == GEMINI_MAX_RETRIES:
+            return resp
+        await asyncio.sleep(2 ** attempt + random.random())
+
+async def upload_image_to_gemini(image_bytes: bytes, mime: str) -> str:
+    """
+    Upload the raw image bytes through the Gemini Files API and return the
+    file URI to reference from `file_data`, instead of inlining base64.
+    """
+    boundary = uuid.uuid4().hex
+    metadata = orjson.dumps({"file": {"display_name": f"chart-{_pid}-{next(_upload_counter)}"}})
+
+    body = b"".join([
+        f"--{boundary}\r\nContent-Type: application/json; charset=UTF-8\r\n\r\n".encode(),
+        metadata,
+        f"\r\n--{boundary}\r\nContent-Type: {mime}\r\n\r\n".encode(),
+        image_bytes,
+        f"\r\n--{boundary}--\r\n".encode(),
+    ])
+    headers = {
+        "X-Goog-Upload-Protocol": "multipart",
+        "Content-Type": f"multipart/related; boundary={boundary}",
+    }
+    resp = await _post_to_gemini(
+        GEMINI_UPLOAD_URL + "?key=" + GEMINI_KEY,
+        content=body,
+        headers=headers,
+        timeout=60,
+    )
     if resp.status_code != 200:
-            raise HTTPException(502, detail=f"AI API error: {resp.text}")
+        raise HTTPException(502, detail=f"AI upload error: {resp.text}")
+    return orjson.loads(resp.content)["file"]["uri"]
+
+async def get_gemini_file_uri(image_bytes: bytes, mime: str) -> str:
+    """Upload the image unless the same bytes were uploaded recently."""
+    key = (hashlib.sha256(image_bytes).digest(), mime)
+    cached = _upload_cache.get(key)
+    if cached is not None and time.monotonic() < cached[0]:
+        _upload_cache.move_to_end(key)
+        return cached[1]
+
+    file_uri = await upload_image_to_gemini(image_bytes, mime)
+    _upload_cache[key] = (time.monotonic() + UPLOAD_CACHE_TTL, file_uri)
+    _upload_cache.move_to_end(key)
+    while len(_upload_cache) > UPLOAD_CACHE_SIZE:
+        _upload_cache.popitem(last=False)
+    return file_uri
+
+async def analyze_image_with_gemini(image_bytes: bytes, mime: str, timeframe: str) -> dict:
+    file_uri = await get_gemini_file_uri(image_bytes, mime)
+    return await analyze_gemini_file(file_uri, mime, timeframe)
+
+async def _generate(body: bytes):
+    """POST a generateContent body and return the model's parsed JSON answer."""
+    resp = await _post_to_gemini(
+        GEMINI_GENERATE_URL,
+        content=body,
+        headers=JSON_HEADERS,
+        timeout=60,
+    )
+    if resp.status_code != 200:
+        raise HTTPException(502, detail=f"AI API error: {resp.text}")
+
+    try:
+        raw = GeminiResponse.model_validate_json(resp.content)
+        return orjson.loads(raw.candidates[0].content.parts[0].text)
+    except (ValidationError, IndexError, orjson.JSONDecodeError):
+        raise HTTPException(502, detail=f"AI API returned an unexpected response: {resp.text}")
+
+async def analyze_gemini_file(file_uri: str, mime: str, timeframe: str) -> dict:
+    """Run the chart analysis prompt against an image already uploaded to Gemini."""
+    return await _generate(_build_generate_body(file_uri, mime, timeframe))
+
+# Several charts can share one generateContent call: each image is labelled
+# with its timeframe and the model answers with one result per image, in order.
+BATCH_PROMPT = (
+    f"{PROMPT_PREFIX}given just before that image{PROMPT_MIDDLE}"
+    f"the selected timeframe{PROMPT_SUFFIX}\n"
+    "Apply these instructions to each chart image above independently and "
+    "respond ONLY with a JSON array holding one such JSON object per image, "
+    "in the same order as the images."
+)
+
+def _build_batch_body(items) -> bytes:
+    parts = []
+    for i, (file_uri, mime, timeframe) in enumerate(items, 1):
+        parts.append({"text": f"Chart {i}, selected timeframe: {timeframe}"})
+        parts.append({"file_data": {"mime_type": mime, "file_uri": file_uri}})
+    parts.append({"text": BATCH_PROMPT})
+    return orjson.dumps({"contents": [{"parts": parts}], "generationConfig": GENERATION_CONFIG})
+
+class ChartBatcher:
+    """
+    Collects analyses submitted within `window` seconds of each other and
+    sends up to `max_batch` of them as one Gemini request, saving RPM quota.
+    A batch of one, a failed batch call, or a batch answer that doesn't line
+    up with its images goes through the single-image path instead, and each
+    caller gets its own result or error.
+    """
+
+    def __init__(self, max_batch: int, window: float):
+        self.max_batch = max_batch
+        self.window = window
+        self._pending = []
+        self._timer = None
+        self._tasks = set()
+
+    async def submit(self, file_uri: str, mime: str, timeframe: str) -> dict:
+        if self.max_batch <= 1:
+            return await analyze_gemini_file(file_uri, mime, timeframe)
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append(((file_uri, mime, timeframe), future))
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.create_task(self._run(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch):
+        items = [item for item, _ in batch]
+        try:
+            results = None
+            if len(items) > 1:
+                try:
+                    answer = await _generate(_build_batch_body(items))
+                except Exception:
+                    answer = None
+                if (isinstance(answer, list) and len(answer) == len(items)
+                        and all(isinstance(result, dict) for result in answer)):
+                    results = answer
+            if results is None:
+                # One request per image, so each caller gets its own outcome
+                results = await asyncio.gather(
+                    *(analyze_gemini_file(*item) for item in items), return_exceptions=True
+                )
+            for (_, future), result in zip(batch, results):
+                if future.done():
+                    continue
+                if isinstance(result, asyncio.CancelledError):
+                    future.cancel()
+                elif isinstance(result, BaseException):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+        finally:
+            # Never leave a caller waiting, even if this task is cancelled
+            for _, future in batch:
+                if not future.done():
+                    future.cancel()
 
-    raw = resp.json()
-    candidate = raw["candidates"][0]["content"]["parts"][0]["text"]
-    return json.loads(candidate)
+# Off by default (batch size 1); set GEMINI_BATCH_MAX > 1 to enable
+chart_batcher = ChartBatcher(
+    max_batch=int(os.getenv("GEMINI_BATCH_MAX", 1)),
+    window=int(os.getenv("GEMINI_BATCH_WINDOW_MS", 50)) / 1000,
+)
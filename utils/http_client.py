@@ -1,7 +1,17 @@
 import httpx
+import orjson
+
+# Shared client so outbound calls reuse pooled keep-alive connections
+client = httpx.AsyncClient(
+    http2=True,
+    timeout=10.0,
+    limits=httpx.Limits(max_connections=64),
+)
 
 async def fetch_json(url: str, headers: dict = None, params: dict = None):
-    async with httpx.AsyncClient(timeout=10.0) as client:
-        response = await client.get(url, headers=headers, params=params)
-        response.raise_for_status()
-        return response.json()
+    response = await client.get(url, headers=headers, params=params)
+    response.raise_for_status()
+    return orjson.loads(response.content)
+
+async def close_http_client():
+    await client.aclose()
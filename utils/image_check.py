@@ -1,18 +1,60 @@
 import cv2
 import numpy as np
 
-def is_trading_chart(path: str) -> bool:
-    img = cv2.imread(path, cv2.IMREAD_GRAYSCALE)
+# Images are shrunk so their longer side is at most this before edge detection
+MAX_WORKING_SIDE = 1024
+
+# Edge-pixel density bounds: charts typically sit around 2-15%, so sparse
+# images (flat backgrounds) and dense ones (photos, noise) are rejected early
+MIN_EDGE_FRACTION = 0.01
+MAX_EDGE_FRACTION = 0.25
+
+# Straight runs shorter than this (in working-resolution pixels) are ignored
+LINE_KERNEL_LENGTH = 25
+HORIZONTAL_KERNEL = cv2.getStructuringElement(cv2.MORPH_RECT, (LINE_KERNEL_LENGTH, 1))
+VERTICAL_KERNEL = cv2.getStructuringElement(cv2.MORPH_RECT, (1, LINE_KERNEL_LENGTH))
+
+# Same bar as the old Hough check: roughly 20 lines of 100px at full size
+MIN_LINES = 20
+MIN_LINE_LENGTH = 100
+
+
+def _count_lines(mask, extent: int, min_length: float) -> int:
+    # Each connected run in an opened mask is one line; `extent` picks its
+    # width (horizontal) or height (vertical) from the stats. Label 0 is
+    # the background.
+    _, _, stats, _ = cv2.connectedComponentsWithStats(mask, connectivity=8)
+    return int(np.count_nonzero(stats[1:, extent] >= min_length))
+
+
+def is_trading_chart(data: bytes) -> bool:
+    if not data:
+        return False
+    img = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_GRAYSCALE)
     if img is None:
         return False
 
+    # Every step below is O(pixels), so a 4K screenshot capped at 1024px is
+    # ~9x less work; the line-length bar is scaled by the same factor.
+    scale = min(1.0, MAX_WORKING_SIDE / max(img.shape[:2]))
+    if scale < 1.0:
+        img = cv2.resize(img, (0, 0), fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+
     edges = cv2.Canny(img, 50, 150, apertureSize=3)
-    lines = cv2.HoughLinesP(
-        edges,
-        rho=1,
-        theta=np.pi/180,
-        threshold=100,
-        minLineLength=100,
-        maxLineGap=10
+
+    edge_frac = cv2.countNonZero(edges) / edges.size
+    if not MIN_EDGE_FRACTION <= edge_frac <= MAX_EDGE_FRACTION:
+        return False
+
+    # Opening with 1xN / Nx1 kernels keeps only long horizontal (price grid)
+    # and vertical (time grid, candle) runs; a chart needs both.
+    min_length = MIN_LINE_LENGTH * scale
+    horizontal = _count_lines(
+        cv2.morphologyEx(edges, cv2.MORPH_OPEN, HORIZONTAL_KERNEL), cv2.CC_STAT_WIDTH, min_length
+    )
+    vertical = _count_lines(
+        cv2.morphologyEx(edges, cv2.MORPH_OPEN, VERTICAL_KERNEL), cv2.CC_STAT_HEIGHT, min_length
     )
-    return lines is not None and len(lines) > 20
+    if not horizontal or not vertical:
+        return False
+    return horizontal + vertical >= MIN_LINES
@@ -1,14 +1,23 @@
 # utils/jwt.py
-import os
-from datetime import datetime, timedelta
+import time
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
 from typing import Union
 
-from jose import JWTError, jwt
+import jwt
+from jwt import ExpiredSignatureError
 
-# Load from env
-SECRET_KEY = os.getenv("JWT_SECRET_KEY")
-ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")
-ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("JWT_ACCESS_TOKEN_EXPIRE_MINUTES", 60))
+from utils.settings import settings
+
+SECRET_KEY = settings.jwt_secret_key
+ALGORITHM = settings.jwt_algorithm
+ACCESS_TOKEN_EXPIRE_MINUTES = settings.jwt_access_token_expire_minutes
+
+# Token lifetime as a timedelta once, rather than building one per token
+_ACCESS_TOKEN_TTL = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+
+# HMAC key as bytes once, rather than encoding the str on every call
+_SECRET_KEY_BYTES = SECRET_KEY.encode()
 
 def create_access_token(data: dict, expires_delta: Union[timedelta, None] = None) -> str:
     """
@@ -17,15 +26,25 @@ def create_access_token(data: dict, expires_delta: Union[timedelta, None] = None
     - expires_delta: timedelta for expiration (defaults to ACCESS_TOKEN_EXPIRE_MINUTES)
     """
     to_encode = data.copy()
-    expire = datetime.utcnow() + (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
+    expire = datetime.now(timezone.utc) + (expires_delta or _ACCESS_TOKEN_TTL)
     to_encode.update({"exp": expire})
-    token = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    token = jwt.encode(to_encode, _SECRET_KEY_BYTES, algorithm=ALGORITHM)
     return token
 
+@lru_cache(maxsize=10000)
+def _decode_token(token: str) -> dict:
+    # Tokens are immutable, so a signature that verified once stays valid;
+    # only expiry needs re-checking on later hits.
+    return jwt.decode(token, _SECRET_KEY_BYTES, algorithms=[ALGORITHM])
+
 def verify_access_token(token: str) -> dict:
     """
     Verifies the JWT and returns the payload if valid.
-    Raises JWTError on failure.
+    Decoded payloads are cached per token; `exp` is re-checked on every call.
+    Raises jwt.InvalidTokenError on failure.
     """
-    payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-    return payload
+    payload = _decode_token(token)
+    exp = payload.get("exp")
+    if exp is not None and exp < time.time():
+        raise ExpiredSignatureError("Signature has expired.")
+    return dict(payload)
@@ -0,0 +1,14 @@
+import os
+
+import redis.asyncio as redis
+from dotenv import load_dotenv
+
+load_dotenv()
+
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379")
+
+# Shared connection pool for rate limiting and caching
+redis_client = redis.from_url(REDIS_URL, encoding="utf-8", decode_responses=True)
+
+async def close_redis():
+    await redis_client.aclose()
@@ -1,19 +1,30 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from jose import JWTError
+from jwt import InvalidTokenError
 from typing import Optional
 
 from utils.jwt import verify_access_token
 from models import User
-from utils.db import get_db
-from sqlalchemy.orm import Session
+from utils.db import get_async_db
+from sqlalchemy import select
+from sqlalchemy.orm import load_only
+from sqlalchemy.ext.asyncio import AsyncSession
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
+# The forum only needs who the caller is; skip the hash and OTP columns
+_USER_AUTH_COLUMNS = load_only(User.id, User.email, User.name)
+
 async def get_current_user(
     token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> User:
+    """
+    Resolve the bearer token to its User, with only id, email and name loaded.
+
+    Touching any other attribute triggers a lazy load, which raises
+    MissingGreenlet on the async session; load what you need explicitly.
+    """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -25,10 +36,10 @@ async def get_current_user(
         username: str = payload.get("sub")
         if username is None:
             raise credentials_exception
-    except JWTError:
+    except InvalidTokenError:
         raise credentials_exception
         
-    user = db.query(User).filter(User.email == username).first()
+    user = await db.scalar(select(User).options(_USER_AUTH_COLUMNS).where(User.email == username))
     if user is None:
         raise credentials_exception
         
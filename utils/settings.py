@@ -0,0 +1,33 @@
+# utils/settings.py
+from functools import lru_cache
+from typing import Optional
+
+from pydantic_settings import BaseSettings
+
+
+class Settings(BaseSettings):
+    """
+    Auth/JWT configuration, read once from the environment (and .env).
+    Values are parsed and validated up front, so callers get typed fields.
+    """
+    jwt_secret_key: str
+    jwt_algorithm: str = "HS256"
+    jwt_access_token_expire_minutes: int = 60
+
+    wati_api_endpoint: Optional[str] = None
+    wati_access_token: Optional[str] = None
+
+    bcrypt_rounds: int = 10
+
+    class Config:
+        env_file = ".env"
+        extra = "ignore"
+        frozen = True
+
+
+@lru_cache()
+def get_settings() -> Settings:
+    return Settings()
+
+
+settings = get_settings()